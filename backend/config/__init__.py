@@ -4,7 +4,7 @@
 """
 
 from .settings import settings
-from .logging import setup_logging, get_logger
+from .logging import setup_logging, get_logger, is_log_enabled
 
-__all__ = ["settings", "setup_logging", "get_logger"]
+__all__ = ["settings", "setup_logging", "get_logger", "is_log_enabled"]
 
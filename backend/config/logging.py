@@ -10,6 +10,9 @@ from loguru import logger
 
 from .settings import settings
 
+# 当前生效的最低日志级别（数值），由 setup_logging 设置
+_min_level_no = 0
+
 
 def setup_logging(
     log_level: Optional[str] = None,
@@ -32,6 +35,8 @@ def setup_logging(
         rotation: 日志轮转规则，默认从配置读取
         retention: 日志保留时间，默认从配置读取
     """
+    global _min_level_no
+    
     # 使用配置中的默认值
     log_level = log_level or settings.log_level
     log_file = log_file or settings.log_file
@@ -40,6 +45,7 @@ def setup_logging(
     
     # 移除默认的 handler
     logger.remove()
+    _min_level_no = logger.level(log_level.upper()).no
     
     # ==================== 控制台日志 ====================
     # 添加彩色控制台输出，格式化更易读
@@ -101,6 +107,25 @@ def get_logger(name: str):
     return logger.bind(name=name)
 
 
+def is_log_enabled(level: str) -> bool:
+    """
+    判断指定级别的日志是否会被输出
+    
+    loguru 没有 isEnabledFor，热路径上可以用它跳过只为日志而做的计算。
+    
+    Args:
+        level: 日志级别名称，如 "INFO"
+        
+    Returns:
+        该级别的日志是否会被输出
+        
+    Example:
+        >>> if is_log_enabled("INFO"):
+        ...     logger.info(f"总字符数: {sum(len(c) for c in chunks)}")
+    """
+    return logger.level(level).no >= _min_level_no
+
+
 # 在模块导入时自动初始化日志系统
 if "pytest" not in sys.modules:
     setup_logging()
@@ -210,6 +210,11 @@ class Settings(BaseSettings):
         description="向量库存储路径"
     )
     
+    rag_mmap: bool = Field(
+        default=False,
+        description="load_vector_store 未指定 mmap 时，是否以只读内存映射方式加载 FAISS 索引"
+    )
+    
     # 检索配置
     retriever_search_type: str = Field(
         default="similarity",
@@ -261,6 +266,14 @@ class Settings(BaseSettings):
         description="上传文件存储路径"
     )
     
+    # ==================== Guardrails 配置 ====================
+    guardrails_max_concurrency: int = Field(
+        default=8,
+        ge=1,
+        le=64,
+        description="Guardrails 验证器全局最大并发数"
+    )
+    
     # Pydantic Settings 配置
     model_config = SettingsConfigDict(
         env_file=str(find_env_file()),  # 动态查找 .env 文件
@@ -2,7 +2,7 @@
 Guardrails 模块 - 提供输入输出安全检查和结构化输出功能
 """
 
-from .content_filters import ContentFilter, ContentSafetyLevel
+from .content_filters import ContentFilter, ContentSafetyLevel, PreparedText, prepare_text
 from .input_validators import InputValidator, InputValidationResult
 from .output_validators import OutputValidator, OutputValidationResult
 from .schemas import (
@@ -18,11 +18,14 @@ from .schemas import (
     QuestionType,
 )
 from .middleware import GuardrailsMiddleware, create_guardrails_runnable
+from .runtime_batch import GuardrailsExecutor, get_guardrails_executor
 
 __all__ = [
     # Filters
     "ContentFilter",
     "ContentSafetyLevel",
+    "PreparedText",
+    "prepare_text",
     # Validators
     "InputValidator",
     "InputValidationResult",
@@ -42,5 +45,8 @@ __all__ = [
     # Middleware
     "GuardrailsMiddleware",
     "create_guardrails_runnable",
+    # Runtime
+    "GuardrailsExecutor",
+    "get_guardrails_executor",
 ]
 
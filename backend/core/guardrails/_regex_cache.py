@@ -0,0 +1,71 @@
+"""
+正则编译缓存
+
+同一个模式字符串在进程内只编译一次，供各个过滤器 / 验证器共享。
+常见的平凡模式（.*、.+、^前缀、^.{m,n}$）直接转换为字符串判断，不经过正则引擎。
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable
+
+_PREFIX_RE = re.compile(r"\^([\w-]+)")
+_LENGTH_RE = re.compile(r"\^\.\{(\d+),(\d+)\}\$")
+
+
+@lru_cache(maxsize=4096)
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    """
+    编译正则表达式（带缓存）
+    
+    Args:
+        pattern: 正则模式字符串
+        flags: re 标志位
+        
+    Returns:
+        编译后的正则对象
+    """
+    return re.compile(pattern, flags)
+
+
+def _strip_final_newline(text: str) -> str:
+    """$ 也能匹配末尾换行符之前的位置"""
+    return text[:-1] if text.endswith("\n") else text
+
+
+@lru_cache(maxsize=4096)
+def compile_check(pattern: str, flags: int = 0) -> Callable[[str], bool]:
+    """
+    将模式编译为判断函数，语义等同于 bool(re.search(pattern, text, flags))
+    
+    Args:
+        pattern: 正则模式字符串
+        flags: re 标志位
+        
+    Returns:
+        接收文本、返回是否命中的函数
+    """
+    if flags == 0:
+        if pattern == ".*":
+            return lambda text: True
+        
+        if pattern == ".+":
+            # . 不匹配换行符
+            return lambda text: bool(text.strip("\n"))
+        
+        match = _PREFIX_RE.fullmatch(pattern)
+        if match:
+            prefix = match.group(1)
+            return lambda text: text.startswith(prefix)
+        
+        match = _LENGTH_RE.fullmatch(pattern)
+        if match:
+            low, high = int(match.group(1)), int(match.group(2))
+            
+            def check_length(text: str) -> bool:
+                text = _strip_final_newline(text)
+                return "\n" not in text and low <= len(text) <= high
+            
+            return check_length
+    
+    return compile_pattern(pattern, flags).search
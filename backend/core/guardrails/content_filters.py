@@ -4,9 +4,33 @@
 
 import re
 from enum import Enum
-from typing import List, Dict, Tuple
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from dataclasses import dataclass
 
+from ._regex_cache import compile_check, compile_pattern
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+def _build_automaton(words: List[str]):
+    """为字面量关键词构建 Aho-Corasick 自动机（未安装 pyahocorasick 时返回 None）"""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+
+# 批量过滤时拼接各字段使用的分隔符：既不是 \s 也不是 \w，
+# 因此任何检测模式都不会跨字段命中
+FIELD_SEPARATOR = "\x00"
+
 
 class ContentSafetyLevel(Enum):
     """内容安全级别"""
@@ -23,6 +47,32 @@ class FilterResult:
     issues: List[str]
     filtered_content: str
     details: Dict[str, any]
+    
+    @classmethod
+    def safe(cls, text: str) -> "FilterResult":
+        """未发现任何问题时的过滤结果"""
+        return cls(
+            is_safe=True,
+            safety_level=ContentSafetyLevel.SAFE,
+            issues=[],
+            filtered_content=text,
+            details={},
+        )
+
+
+class PreparedText(NamedTuple):
+    """
+    预处理后的文本
+    
+    同一段文本交给多个验证器时只需预处理一次，各验证器共享结果。
+    """
+    text: str
+    lower: str
+
+
+def prepare_text(text: str) -> PreparedText:
+    """预处理文本（小写化），供 filter_input / filter_output / validate 的 prepared 参数使用"""
+    return PreparedText(text, text.lower())
 
 
 class ContentFilter:
@@ -58,6 +108,18 @@ class ContentFilter:
         r"<\|im_start\|>",
     ]
     
+    # 预编译正则，避免每次调用时查找/编译
+    _PII_RES = {name: compile_pattern(pattern) for name, pattern in PATTERNS.items()}
+    # 检测只需判断是否命中，平凡模式会转换为字符串判断
+    _PII_CHECKS = {name: compile_check(pattern) for name, pattern in PATTERNS.items()}
+    _INJECTION_RES = [(pattern, compile_pattern(pattern, re.IGNORECASE)) for pattern in INJECTION_PATTERNS]
+    # 所有注入模式合并为一个正则，未命中时无需逐个检查
+    _INJECTION_ANY_RE = compile_pattern("|".join(f"(?:{p})" for p in INJECTION_PATTERNS), re.IGNORECASE)
+    # 关键词都是字面量：用 Aho-Corasick 单遍扫描，未安装时逐个子串查找
+    _KEYWORD_BY_LOWER = {kw.lower(): kw for kw in UNSAFE_KEYWORDS}
+    _KEYWORDS_AUTOMATON = _build_automaton(list(_KEYWORD_BY_LOWER))
+    _CARD_SEP_RE = compile_pattern(r"[\s-]")
+    
     def __init__(
         self,
         enable_pii_detection: bool = True,
@@ -79,12 +141,13 @@ class ContentFilter:
         self.enable_injection_detection = enable_injection_detection
         self.mask_pii = mask_pii
     
-    def filter_input(self, text: str) -> FilterResult:
+    def filter_input(self, text: str, prepared: Optional[PreparedText] = None) -> FilterResult:
         """
         过滤输入内容
         
         Args:
             text: 输入文本
+            prepared: 已预处理的 text（可选，必须由 prepare_text(text) 得到）
             
         Returns:
             FilterResult: 过滤结果
@@ -117,7 +180,9 @@ class ContentFilter:
         
         # 3. 检测不安全内容
         if self.enable_content_safety:
-            unsafe_detected, unsafe_keywords = self._detect_unsafe_content(text)
+            unsafe_detected, unsafe_keywords = self._detect_unsafe_content(
+                text, prepared.lower if prepared is not None else None
+            )
             if unsafe_detected:
                 issues.append(f"检测到不安全内容: {', '.join(unsafe_keywords)}")
                 details["unsafe_keywords"] = unsafe_keywords
@@ -139,12 +204,13 @@ class ContentFilter:
             details=details,
         )
     
-    def filter_output(self, text: str) -> FilterResult:
+    def filter_output(self, text: str, prepared: Optional[PreparedText] = None) -> FilterResult:
         """
         过滤输出内容
         
         Args:
             text: 输出文本
+            prepared: 已预处理的 text（可选，必须由 prepare_text(text) 得到）
             
         Returns:
             FilterResult: 过滤结果
@@ -168,7 +234,9 @@ class ContentFilter:
         
         # 2. 检测不安全内容
         if self.enable_content_safety:
-            unsafe_detected, unsafe_keywords = self._detect_unsafe_content(text)
+            unsafe_detected, unsafe_keywords = self._detect_unsafe_content(
+                text, prepared.lower if prepared is not None else None
+            )
             if unsafe_detected:
                 issues.append(f"输出包含不安全内容: {', '.join(unsafe_keywords)}")
                 details["unsafe_keywords"] = unsafe_keywords
@@ -186,12 +254,13 @@ class ContentFilter:
     
     def _detect_injection(self, text: str) -> Tuple[bool, List[str]]:
         """检测 Prompt Injection"""
-        detected_patterns = []
-        text_lower = text.lower()
+        if not self._INJECTION_ANY_RE.search(text):
+            return False, []
         
-        for pattern in self.INJECTION_PATTERNS:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                detected_patterns.append(pattern)
+        detected_patterns = [
+            pattern for pattern, regex in self._INJECTION_RES
+            if regex.search(text)
+        ]
         
         return len(detected_patterns) > 0, detected_patterns
     
@@ -199,8 +268,8 @@ class ContentFilter:
         """检测个人敏感信息"""
         found_types = []
         
-        for pii_type, pattern in self.PATTERNS.items():
-            if re.search(pattern, text):
+        for pii_type, check in self._PII_CHECKS.items():
+            if check(text):
                 found_types.append(pii_type)
         
         return len(found_types) > 0, found_types
@@ -210,50 +279,50 @@ class ContentFilter:
         masked_text = text
         
         # 手机号脱敏
-        masked_text = re.sub(
-            self.PATTERNS["phone"],
+        masked_text = self._PII_RES["phone"].sub(
             lambda m: m.group()[:3] + "****" + m.group()[-4:],
             masked_text
         )
         
         # 邮箱脱敏
-        masked_text = re.sub(
-            self.PATTERNS["email"],
+        masked_text = self._PII_RES["email"].sub(
             lambda m: m.group().split("@")[0][:2] + "***@" + m.group().split("@")[1],
             masked_text
         )
         
         # 身份证脱敏
-        masked_text = re.sub(
-            self.PATTERNS["id_card"],
+        masked_text = self._PII_RES["id_card"].sub(
             lambda m: m.group()[:6] + "********" + m.group()[-4:],
             masked_text
         )
         
         # 信用卡脱敏
-        masked_text = re.sub(
-            self.PATTERNS["credit_card"],
-            lambda m: "****-****-****-" + re.sub(r"[\s-]", "", m.group())[-4:],
+        masked_text = self._PII_RES["credit_card"].sub(
+            lambda m: "****-****-****-" + self._CARD_SEP_RE.sub("", m.group())[-4:],
             masked_text
         )
         
         # IP 地址脱敏
-        masked_text = re.sub(
-            self.PATTERNS["ip_address"],
+        masked_text = self._PII_RES["ip_address"].sub(
             lambda m: ".".join(m.group().split(".")[:2]) + ".***.***.***",
             masked_text
         )
         
         return masked_text
     
-    def _detect_unsafe_content(self, text: str) -> Tuple[bool, List[str]]:
-        """检测不安全内容"""
-        found_keywords = []
-        text_lower = text.lower()
-        
-        for keyword in self.UNSAFE_KEYWORDS:
-            if keyword.lower() in text_lower:
-                found_keywords.append(keyword)
+    def _detect_unsafe_content(self, text: str, lowered: Optional[str] = None) -> Tuple[bool, List[str]]:
+        """检测不安全内容（lowered 为已小写化的 text，可省略）"""
+        if lowered is None:
+            lowered = text.lower()
+        if self._KEYWORDS_AUTOMATON is not None:
+            matched = {word for _, word in self._KEYWORDS_AUTOMATON.iter(lowered)}
+        else:
+            matched = lowered
+        # 按 UNSAFE_KEYWORDS 中的顺序返回
+        found_keywords = [
+            keyword for lower, keyword in self._KEYWORD_BY_LOWER.items()
+            if lower in matched
+        ]
         
         return len(found_keywords) > 0, found_keywords
 
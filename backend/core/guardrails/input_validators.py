@@ -4,7 +4,13 @@
 
 from typing import Optional, Dict, Any
 from dataclasses import dataclass
-from .content_filters import ContentFilter, ContentSafetyLevel
+from .content_filters import (
+    ContentFilter,
+    ContentSafetyLevel,
+    FilterResult,
+    FIELD_SEPARATOR,
+    PreparedText,
+)
 
 
 @dataclass
@@ -44,16 +50,54 @@ class InputValidator:
         self.allow_empty = allow_empty
         self.strict_mode = strict_mode
     
-    def validate(self, user_input: str) -> InputValidationResult:
+    def validate(
+        self,
+        user_input: str,
+        pretokenized: Optional[PreparedText] = None,
+    ) -> InputValidationResult:
         """
         验证用户输入
         
         Args:
             user_input: 用户输入文本
+            pretokenized: prepare_text(user_input) 的结果（可选），
+                多个验证器处理同一文本时共享，避免重复预处理
             
         Returns:
             InputValidationResult: 验证结果
         """
+        return self._validate(user_input, pretokenized=pretokenized)
+    
+    def validate_many(self, fields: Dict[str, str]) -> Dict[str, InputValidationResult]:
+        """
+        批量验证多个字段
+        
+        先将所有字段拼接后整体过滤一次；整体没有任何问题时各字段
+        不必再逐个扫描，否则退回逐字段验证以得到精确结果。
+        
+        Args:
+            fields: {字段名: 文本}
+            
+        Returns:
+            {字段名: 验证结果}
+        """
+        if len(fields) > 1:
+            combined = self.content_filter.filter_input(FIELD_SEPARATOR.join(fields.values()))
+            if combined.safety_level == ContentSafetyLevel.SAFE and not combined.issues:
+                return {
+                    name: self._validate(text, FilterResult.safe(text))
+                    for name, text in fields.items()
+                }
+        
+        return {name: self._validate(text) for name, text in fields.items()}
+    
+    def _validate(
+        self,
+        user_input: str,
+        filter_result: Optional[FilterResult] = None,
+        pretokenized: Optional[PreparedText] = None,
+    ) -> InputValidationResult:
+        """验证用户输入；filter_result 已知时跳过内容过滤"""
         errors = []
         warnings = []
         metadata = {}
@@ -86,10 +130,19 @@ class InputValidator:
             errors.append(f"输入长度不足（最少 {self.min_length} 字符）")
         
         if input_length > self.max_length:
+            # 超长输入直接判定无效，不再对整段文本做内容扫描
             errors.append(f"输入长度超限（最多 {self.max_length} 字符）")
+            return InputValidationResult(
+                is_valid=False,
+                filtered_input=user_input,
+                errors=errors,
+                warnings=warnings,
+                metadata=metadata,
+            )
         
         # 3. 内容安全检查
-        filter_result = self.content_filter.filter_input(user_input)
+        if filter_result is None:
+            filter_result = self.content_filter.filter_input(user_input, pretokenized)
         metadata["safety_level"] = filter_result.safety_level.value
         metadata["filter_details"] = filter_result.details
         
@@ -4,7 +4,13 @@
 
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
-from .content_filters import ContentFilter, ContentSafetyLevel
+from .content_filters import (
+    ContentFilter,
+    ContentSafetyLevel,
+    FilterResult,
+    FIELD_SEPARATOR,
+    PreparedText,
+)
 
 
 @dataclass
@@ -54,6 +60,7 @@ class OutputValidator:
         output: str,
         sources: Optional[List[str]] = None,
         context: Optional[Dict[str, Any]] = None,
+        pretokenized: Optional[PreparedText] = None,
     ) -> OutputValidationResult:
         """
         验证模型输出
@@ -62,10 +69,53 @@ class OutputValidator:
             output: 模型输出文本
             sources: 引用来源列表
             context: 额外上下文信息
+            pretokenized: prepare_text(output) 的结果（可选），
+                多个验证器处理同一文本时共享，避免重复预处理
             
         Returns:
             OutputValidationResult: 验证结果
         """
+        return self._validate(output, sources, context, pretokenized=pretokenized)
+    
+    def validate_many(
+        self,
+        fields: Dict[str, str],
+        sources: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, OutputValidationResult]:
+        """
+        批量验证多个输出字段
+        
+        先将所有字段拼接后整体过滤一次；整体没有任何问题时各字段
+        不必再逐个扫描，否则退回逐字段验证以得到精确结果。
+        
+        Args:
+            fields: {字段名: 文本}
+            sources: 引用来源列表（对每个字段生效）
+            context: 额外上下文信息
+            
+        Returns:
+            {字段名: 验证结果}
+        """
+        if len(fields) > 1:
+            combined = self.content_filter.filter_output(FIELD_SEPARATOR.join(fields.values()))
+            if combined.safety_level == ContentSafetyLevel.SAFE and not combined.issues:
+                return {
+                    name: self._validate(text, sources, context, FilterResult.safe(text))
+                    for name, text in fields.items()
+                }
+        
+        return {name: self._validate(text, sources, context) for name, text in fields.items()}
+    
+    def _validate(
+        self,
+        output: str,
+        sources: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        filter_result: Optional[FilterResult] = None,
+        pretokenized: Optional[PreparedText] = None,
+    ) -> OutputValidationResult:
+        """验证模型输出；filter_result 已知时跳过内容过滤"""
         errors = []
         warnings = []
         metadata = {}
@@ -93,7 +143,8 @@ class OutputValidator:
             errors.append(f"输出长度超限（超过 {self.max_length} 字符）")
         
         # 3. 内容安全检查
-        filter_result = self.content_filter.filter_output(output)
+        if filter_result is None:
+            filter_result = self.content_filter.filter_output(output, pretokenized)
         metadata["safety_level"] = filter_result.safety_level.value
         metadata["filter_details"] = filter_result.details
         
@@ -112,7 +163,8 @@ class OutputValidator:
             else:
                 metadata["sources_count"] = len(sources)
                 # 检查输出是否真的使用了来源
-                if not self._check_source_usage(output, sources):
+                lowered = pretokenized.lower if pretokenized is not None else None
+                if not self._check_source_usage(output, sources, lowered):
                     warnings.append("输出可能未充分使用提供的来源")
 
         # 5. 示例检查（技术主题场景）
@@ -163,20 +215,30 @@ class OutputValidator:
         
         return result.filtered_output
     
-    def _check_source_usage(self, output: str, sources: List[str]) -> bool:
+    def _check_source_usage(
+        self,
+        output: str,
+        sources: List[str],
+        lowered: Optional[str] = None,
+    ) -> bool:
         """
         检查输出是否使用了来源
         
         简单实现：检查来源中的关键词是否出现在输出中
+        lowered 为已小写化的 output，可省略
         """
         if not sources:
             return False
         
+        # 输出的词集合与来源无关，只计算一次
+        if lowered is None:
+            lowered = output.lower()
+        output_words = set(lowered.split())
+        
         # 简单检查：至少有一个来源的部分内容出现在输出中
         for source in sources:
             # 提取来源中的关键词（简单实现）
             source_words = set(source.lower().split())
-            output_words = set(output.lower().split())
             
             # 如果有超过 30% 的词重叠，认为使用了该来源
             if len(source_words) > 0:
@@ -0,0 +1,132 @@
+"""
+Guardrails 执行器 - 为所有验证调用提供统一的有界并发
+
+各个安全节点包装器不再各自创建线程，而是把验证器调用提交到同一个
+执行器，由它限制全局并发数并统计调用情况。
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import settings, get_logger
+
+logger = get_logger(__name__)
+
+
+class GuardrailsExecutor:
+    """
+    有界并发的验证器执行器
+    
+    同步调用方通过 submit 得到 concurrent.futures.Future，异步调用方通过
+    asubmit 等待结果；两者共用同一个线程池，并发上限为 max_concurrency。
+    
+    Example:
+        >>> executor = GuardrailsExecutor(max_concurrency=4)
+        >>> result = executor.submit(validator.validate, text).result()
+        >>> result = await executor.asubmit(validator.validate, text)
+    """
+    
+    def __init__(self, max_concurrency: int = 8):
+        """
+        初始化执行器
+        
+        Args:
+            max_concurrency: 同时执行的验证调用上限
+        """
+        self.max_concurrency = max_concurrency
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="guardrails",
+        )
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._in_flight = 0
+        self._success = 0
+        self._failure = 0
+    
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        提交一次验证调用
+        
+        Args:
+            fn: 要执行的函数（通常是 validator.validate）
+            *args, **kwargs: 传给 fn 的参数
+            
+        Returns:
+            concurrent.futures.Future
+        """
+        with self._lock:
+            self._in_flight += 1
+        
+        if getattr(self._local, "active", False):
+            # 已在执行器线程中（例如多个验证器的嵌套提交）：直接执行，
+            # 避免等待子任务的线程占满线程池而死锁
+            future = Future()
+            try:
+                future.set_result(self._run(fn, args, kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        
+        return self._pool.submit(self._run, fn, args, kwargs)
+    
+    async def asubmit(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        异步提交一次验证调用并等待结果
+        
+        Args:
+            fn: 要执行的函数
+            *args, **kwargs: 传给 fn 的参数
+            
+        Returns:
+            fn 的返回值
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+    
+    def stats(self) -> Dict[str, int]:
+        """返回当前统计：in_flight / success / failure"""
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "success": self._success,
+                "failure": self._failure,
+            }
+    
+    def _run(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        """在线程池中执行并更新计数"""
+        ok = False
+        nested = getattr(self._local, "active", False)
+        self._local.active = True
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            self._local.active = nested
+            with self._lock:
+                self._in_flight -= 1
+                if ok:
+                    self._success += 1
+                else:
+                    self._failure += 1
+                stats = (self._in_flight, self._success, self._failure)
+            logger.debug(
+                "[Guardrails] 执行器 in_flight={} success={} failure={}",
+                *stats,
+            )
+
+
+_EXECUTOR: Optional[GuardrailsExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_guardrails_executor() -> GuardrailsExecutor:
+    """获取进程内共享的执行器（并发上限取自 settings.guardrails_max_concurrency）"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = GuardrailsExecutor(settings.guardrails_max_concurrency)
+    return _EXECUTOR
@@ -21,6 +21,7 @@
 
 import os
 import json
+import fnmatch
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 from datetime import datetime
@@ -235,11 +236,24 @@ class ResearchFileSystem:
         
         # 查找文件（排除元数据文件）
         files = []
-        for file_path in search_path.glob(pattern):
-            if file_path.is_file() and not file_path.name.endswith('.meta.json'):
-                # 返回相对于工作空间的路径
-                relative_path = file_path.relative_to(self.workspace_path)
-                files.append(str(relative_path))
+        if "/" in pattern or "**" in pattern:
+            # 跨目录的模式交给 glob 处理
+            for file_path in search_path.glob(pattern):
+                if file_path.is_file() and not file_path.name.endswith('.meta.json'):
+                    # 返回相对于工作空间的路径
+                    relative_path = file_path.relative_to(self.workspace_path)
+                    files.append(str(relative_path))
+        else:
+            # 单层目录直接 scandir：文件类型随目录项一起返回，无需逐个 stat
+            prefix = search_path.relative_to(self.workspace_path)
+            with os.scandir(search_path) as entries:
+                for entry in entries:
+                    if (
+                        entry.is_file()
+                        and not entry.name.endswith('.meta.json')
+                        and fnmatch.fnmatch(entry.name, pattern)
+                    ):
+                        files.append(str(prefix / entry.name))
         
         logger.debug(f"📋 列出文件: {len(files)} 个文件")
         return sorted(files)
@@ -22,6 +22,7 @@ from rag.vector_stores import create_vector_store, load_vector_store, save_vecto
 from rag.retrievers import create_retriever, create_retriever_tool
 from rag.rag_agent import create_rag_agent, query_rag_agent
 from rag.index_manager import IndexManager
+from rag.semantic_cache import SemanticCache
 
 __all__ = [
     # 文档加载
@@ -51,5 +52,8 @@ __all__ = [
     
     # 索引管理
     "IndexManager",
+    
+    # 语义缓存
+    "SemanticCache",
 ]
 
@@ -0,0 +1,49 @@
+"""
+检索分数处理
+
+将向量库返回的分数统一转换为相似度（越大越相似），并选出前 k 个结果。
+"""
+
+import numpy as np
+
+
+def to_similarity(scores: np.ndarray, distance_strategy=None) -> np.ndarray:
+    """
+    将检索分数转换为相似度
+    
+    FAISS 默认返回平方 L2 距离。对单位向量有 ||a - b||² = 2 - 2·cos，
+    因此余弦相似度为 1 - d / 2。其他度量返回的分数本身就是相似度。
+    
+    Args:
+        scores: 一维分数数组
+        distance_strategy: 向量库的 distance_strategy（可选）
+    
+    Returns:
+        一维相似度数组
+    """
+    scores = np.asarray(scores, dtype="float32")
+    strategy = getattr(distance_strategy, "value", distance_strategy)
+    if strategy == "EUCLIDEAN_DISTANCE":
+        return 1.0 - 0.5 * scores
+    return scores
+
+
+def topk(similarities: np.ndarray, k: int) -> np.ndarray:
+    """
+    返回相似度最高的 k 个位置，按相似度降序排列
+    
+    先用 argpartition 以 O(N) 选出候选，再只对这 k 个排序。
+    
+    Args:
+        similarities: 一维相似度数组
+        k: 返回数量
+    
+    Returns:
+        下标数组
+    """
+    n = similarities.shape[0]
+    if k >= n:
+        return np.argsort(-similarities, kind="stable")
+    
+    candidates = np.argpartition(-similarities, k)[:k]
+    return candidates[np.argsort(-similarities[candidates], kind="stable")]
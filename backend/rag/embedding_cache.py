@@ -0,0 +1,105 @@
+"""
+Embedding 缓存模块
+
+按文本内容缓存 embedding 向量，重建索引时未改动的文本块无需再次请求
+embedding 服务。
+
+- 缓存键为 SHA-256(模型名 + 文本)，更换模型后自动失效
+- 向量以 float32 字节存储在 SQLite 中，单文件、无需额外服务
+"""
+
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from config import get_logger
+
+logger = get_logger(__name__)
+
+# 单条 SQL 中 IN 子句的最大参数数（SQLite 旧版本上限为 999）
+_SQL_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    基于 SQLite 的 embedding 持久化缓存
+    
+    Example:
+        >>> cache = EmbeddingCache("~/.cache/lc-studylab/embeddings.sqlite3", "text-embedding-3-small")
+        >>> keys = [cache.key(text) for text in texts]
+        >>> hits = cache.get_many(keys)
+        >>> misses = [(key, text) for key, text in zip(keys, texts) if key not in hits]
+        >>> vectors = embeddings.embed_documents([text for _, text in misses])
+        >>> cache.put_many(zip([key for key, _ in misses], vectors))
+    """
+    
+    def __init__(self, path: str, model: str):
+        """
+        初始化缓存
+        
+        Args:
+            path: SQLite 数据库文件路径
+            model: embedding 模型名，参与缓存键计算
+        """
+        self.path = Path(path).expanduser()
+        self.model = model
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "hash TEXT PRIMARY KEY, model TEXT, dim INTEGER, vec BLOB)"
+        )
+        self._conn.commit()
+    
+    def key(self, text: str) -> str:
+        """计算文本在当前模型下的缓存键"""
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+    
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        批量读取缓存
+        
+        Args:
+            keys: 缓存键列表
+        
+        Returns:
+            命中的 {缓存键: 向量}
+        """
+        found = {}
+        for start in range(0, len(keys), _SQL_BATCH):
+            batch = keys[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT hash, vec FROM embeddings WHERE hash IN ({placeholders})",
+                batch,
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype="float32").tolist()
+        return found
+    
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]) -> None:
+        """
+        批量写入缓存
+        
+        Args:
+            items: (缓存键, 向量) 序列
+        """
+        rows = []
+        for key, vector in items:
+            vec = np.asarray(vector, dtype="float32")
+            rows.append((key, self.model, vec.shape[0], vec.tobytes()))
+        
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (hash, model, dim, vec) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        self._conn.commit()
+        logger.debug(f"💾 写入 embedding 缓存: {len(rows)} 条")
+    
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._conn.close()
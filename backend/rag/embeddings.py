@@ -51,6 +51,11 @@ class SafeOpenAIEmbeddings(Embeddings):
             logger.warning(f"无法加载 tiktoken 编码器: {e}，使用简单字符截断")
             self.encoding = None
     
+    @property
+    def model(self) -> Optional[str]:
+        """被包装的 embedding 模型名"""
+        return getattr(self.embeddings, "model", None)
+    
     def _truncate_text(self, text: str) -> str:
         """
         截断文本到最大 token 限制
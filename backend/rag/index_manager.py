@@ -76,8 +76,19 @@ class IndexManager:
         self.base_path = Path(base_path or settings.vector_store_path)
         self.base_path.mkdir(parents=True, exist_ok=True)
         
+        # 索引名 -> 已解析的元数据（None 表示没有元数据文件）
+        self._metadata_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+        
         logger.info(f"📁 索引管理器初始化: {self.base_path}")
     
+    def reload(self) -> None:
+        """
+        清空元数据缓存
+        
+        其他进程修改了索引目录后调用，下次访问时重新从磁盘读取。
+        """
+        self._metadata_cache.clear()
+    
     def _get_index_path(self, name: str) -> Path:
         """获取索引的完整路径"""
         return self.base_path / name
@@ -97,11 +108,20 @@ class IndexManager:
         
         with open(metadata_path, "w", encoding="utf-8") as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
+        self._metadata_cache[name] = dict(metadata)
         
         logger.debug(f"💾 保存元数据: {metadata_path}")
     
     def _load_metadata(self, name: str) -> Optional[Dict[str, Any]]:
-        """加载索引元数据"""
+        """加载索引元数据（同一管理器内只解析一次，返回副本）"""
+        if name not in self._metadata_cache:
+            self._metadata_cache[name] = self._read_metadata(name)
+        
+        metadata = self._metadata_cache[name]
+        return dict(metadata) if metadata is not None else None
+    
+    def _read_metadata(self, name: str) -> Optional[Dict[str, Any]]:
+        """从磁盘读取索引元数据"""
         metadata_path = self._get_metadata_path(name)
         
         if not metadata_path.exists():
@@ -195,12 +215,64 @@ class IndexManager:
             # 清理失败的索引
             if index_path.exists():
                 delete_vector_store(str(index_path))
+            self._metadata_cache.pop(name, None)
             raise
     
+    def create_index_from_embeddings(
+        self,
+        name: str,
+        documents: List[Document],
+        vectors: List[List[float]],
+        embeddings: Embeddings,
+        description: str = "",
+        store_type: Optional[str] = None,
+        overwrite: bool = False,
+        **kwargs,
+    ) -> VectorStore:
+        """
+        使用预先计算好的向量创建索引
+        
+        与 create_index 相同，但不再调用 embedding 模型计算文档向量，
+        适用于调用方已经分批计算好 embeddings 的场景。
+        
+        Args:
+            name: 索引名称
+            documents: 文档列表
+            vectors: 与 documents 一一对应的向量
+            embeddings: Embedding 模型（用于后续查询）
+            description: 索引描述
+            store_type: 向量库类型
+            overwrite: 是否覆盖已存在的索引
+            **kwargs: 其他参数
+            
+        Returns:
+            创建的 VectorStore 实例
+            
+        Example:
+            >>> vectors = embeddings.embed_documents([c.page_content for c in chunks])
+            >>> manager.create_index_from_embeddings(
+            ...     name="my_docs",
+            ...     documents=chunks,
+            ...     vectors=vectors,
+            ...     embeddings=embeddings,
+            ... )
+        """
+        return self.create_index(
+            name=name,
+            documents=documents,
+            embeddings=embeddings,
+            description=description,
+            store_type=store_type,
+            overwrite=overwrite,
+            vectors=vectors,
+            **kwargs,
+        )
+    
     def load_index(
         self,
         name: str,
         embeddings: Embeddings,
+        mmap: bool = False,
         **kwargs,
     ) -> VectorStore:
         """
@@ -209,6 +281,9 @@ class IndexManager:
         Args:
             name: 索引名称
             embeddings: Embedding 模型
+            mmap: 是否以只读内存映射方式打开 FAISS 索引。启动时不读取整个
+                索引文件，只有查询访问到的页才会载入内存；首次访问某页的延迟
+                略高，适合大索引的只读查询（加载后的索引不能再添加文档）
             **kwargs: 其他参数
             
         Returns:
@@ -238,6 +313,7 @@ class IndexManager:
             vector_store = load_vector_store(
                 load_path=str(index_path),
                 embeddings=embeddings,
+                mmap=mmap,
                 **kwargs,
             )
             
@@ -253,6 +329,7 @@ class IndexManager:
         name: str,
         documents: List[Document],
         embeddings: Embeddings,
+        vectors: Optional[List[List[float]]] = None,
         **kwargs,
     ) -> VectorStore:
         """
@@ -262,6 +339,7 @@ class IndexManager:
             name: 索引名称
             documents: 要添加的文档列表
             embeddings: Embedding 模型
+            vectors: 与 documents 一一对应的预计算向量（可选）
             **kwargs: 其他参数
             
         Returns:
@@ -283,7 +361,7 @@ class IndexManager:
             vector_store = self.load_index(name, embeddings, **kwargs)
             
             # 添加新文档
-            add_documents_to_vector_store(vector_store, documents)
+            add_documents_to_vector_store(vector_store, documents, vectors=vectors)
             
             # 保存更新后的向量库
             index_path = self._get_index_path(name)
@@ -322,6 +400,7 @@ class IndexManager:
         
         try:
             delete_vector_store(str(index_path))
+            self._metadata_cache.pop(name, None)
             logger.info(f"✅ 索引删除成功: {name}")
             
         except Exception as e:
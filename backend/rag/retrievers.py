@@ -13,6 +13,7 @@
 - https://reference.langchain.com/python/langchain_core/tools/
 """
 
+import re
 from typing import Optional, Literal
 from langchain_core.vectorstores import VectorStore
 from langchain_core.retrievers import BaseRetriever
@@ -25,6 +26,12 @@ logger = get_logger(__name__)
 # 检索类型
 SearchType = Literal["similarity", "mmr", "similarity_score_threshold"]
 
+# 检索工具输出中每个文档的标题行
+TOOL_SOURCE_HEADER = "文档 {index} (来源: {source}):"
+
+# 从检索工具输出中提取来源，与 TOOL_SOURCE_HEADER 对应
+TOOL_SOURCE_RE = re.compile(r"^文档 \d+ \(来源: (.+?)\):$", re.MULTILINE)
+
 
 def create_retriever(
     vector_store: VectorStore,
@@ -89,19 +96,17 @@ def create_retriever(
     
     logger.info(f"🔍 创建检索器: search_type={search_type}, k={k}")
     
-    # 构建搜索参数
-    search_kwargs = {"k": k}
-    
+    # 构建搜索参数（每种检索类型一个固定形状的字典，额外参数直接合并）
     if search_type == "mmr":
-        search_kwargs["fetch_k"] = fetch_k
+        search_kwargs = {"k": k, "fetch_k": fetch_k, **kwargs}
         logger.debug(f"   MMR fetch_k: {fetch_k}")
         
     elif search_type == "similarity_score_threshold":
-        search_kwargs["score_threshold"] = score_threshold
+        search_kwargs = {"k": k, "score_threshold": score_threshold, **kwargs}
         logger.debug(f"   相似度阈值: {score_threshold}")
     
-    # 添加额外的参数
-    search_kwargs.update(kwargs)
+    else:
+        search_kwargs = {"k": k, **kwargs} if kwargs else {"k": k}
     
     try:
         # 创建检索器
@@ -203,7 +208,8 @@ def create_retriever_tool(
             for i, doc in enumerate(docs, 1):
                 content = doc.page_content
                 source = doc.metadata.get("source", "未知来源") if doc.metadata else "未知来源"
-                result_parts.append(f"文档 {i} (来源: {source}):\n{content}")
+                header = TOOL_SOURCE_HEADER.format(index=i, source=source)
+                result_parts.append(f"{header}\n{content}")
             
             return "\n\n".join(result_parts)
         
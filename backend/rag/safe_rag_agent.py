@@ -8,12 +8,16 @@
 4. 自动格式化为 Pydantic 模型
 """
 
-from typing import Optional, Dict, Any, List
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, NamedTuple
 from langchain.agents import create_agent
 from langchain_core.retrievers import BaseRetriever
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
+from langgraph.graph.state import CompiledStateGraph
 
 from config import settings, get_logger
 from core.models import get_model_string
@@ -23,10 +27,62 @@ from core.guardrails import (
     RAGResponse,
     ContentFilter,
 )
-from rag.retrievers import create_retriever_tool
+from rag.retrievers import TOOL_SOURCE_RE, create_retriever_tool
 
 logger = get_logger(__name__)
 
+# 流式脱敏：合并所有 PII 模式，用于判断敏感信息是否跨越 chunk 边界
+_PII_RE = re.compile("|".join(f"(?:{p})" for p in ContentFilter.PATTERNS.values()))
+
+# 所有安全 RAG Agent 共用的内容过滤器：过滤器无状态，正则在 ContentFilter 类上预编译，
+# 共用实例避免每次创建 Agent 时重复构建
+_CONTENT_FILTER = ContentFilter(
+    enable_pii_detection=True,
+    enable_content_safety=True,
+    enable_injection_detection=True,
+    mask_pii=True,
+)
+
+# 流式输出时保留在缓冲区中、暂不输出的尾部字符数
+_STREAM_HOLDBACK = 64
+
+# 已验证回答缓存的最大条目数
+_VALIDATED_CACHE_SIZE = 256
+
+# 检索工具名称
+RETRIEVER_TOOL_NAME = "knowledge_base"
+
+
+def _extract_text(chunk: Any) -> str:
+    """从 messages 模式的流式 chunk 中提取 AI 输出文本"""
+    message = chunk[0] if isinstance(chunk, tuple) else chunk
+    if isinstance(message, AIMessage) and isinstance(message.content, str):
+        return message.content
+    return ""
+
+
+class _ValidatedResponse(NamedTuple):
+    """已通过输出验证的回答"""
+    answer: str
+    sources: tuple
+    hash: bytes
+
+
+def _fingerprint(answer: str) -> bytes:
+    """计算回答的指纹"""
+    return hashlib.blake2b(answer.encode(), digest_size=8).digest()
+
+
+def _final_answer(result: Any) -> str:
+    """从 Agent 结果中提取最终回答（最后一条消息的内容）"""
+    if not isinstance(result, dict):
+        return str(result)
+    messages = result.get("messages")
+    if not messages:
+        return str(result)
+    last = messages[-1]
+    return last.content if hasattr(last, "content") else str(last)
+
 
 # 安全 RAG 系统提示词（强制结构化输出）
 SAFE_RAG_SYSTEM_PROMPT = """你是一个智能问答助手，专门回答基于知识库的问题。
@@ -95,12 +151,7 @@ def create_safe_rag_agent(
     logger.info("🛡️ 创建安全 RAG Agent（带 Guardrails）")
     
     # 创建验证器
-    content_filter = ContentFilter(
-        enable_pii_detection=True,
-        enable_content_safety=True,
-        enable_injection_detection=True,
-        mask_pii=True,
-    )
+    content_filter = _CONTENT_FILTER
     
     input_validator = InputValidator(
         content_filter=content_filter,
@@ -120,7 +171,7 @@ def create_safe_rag_agent(
     # 创建检索器工具
     retriever_tool = create_retriever_tool(
         retriever=retriever,
-        name="knowledge_base",
+        name=RETRIEVER_TOOL_NAME,
         description="搜索知识库中的相关信息。当需要回答关于文档内容的问题时使用此工具。",
     )
     
@@ -152,6 +203,15 @@ def create_safe_rag_agent(
 class SafeRAGAgent:
     """安全 RAG Agent 包装类"""
     
+    __slots__ = (
+        "agent",
+        "retriever",
+        "input_validator",
+        "output_validator",
+        "_validated",
+        "_extract",
+    )
+    
     def __init__(
         self,
         agent,
@@ -172,6 +232,17 @@ class SafeRAGAgent:
         self.retriever = retriever
         self.input_validator = input_validator
         self.output_validator = output_validator
+        
+        # 已通过输出验证的回答（按指纹索引），命中时跳过重复验证
+        self._validated: OrderedDict[bytes, _ValidatedResponse] = OrderedDict()
+        
+        # create_agent 返回的 LangGraph 图只产出 messages，
+        # 旧式 AgentExecutor 则通过 intermediate_steps 返回检索结果
+        self._extract = (
+            self._extract_from_messages
+            if isinstance(agent, CompiledStateGraph)
+            else self._extract_from_steps
+        )
     
     def query(
         self,
@@ -217,16 +288,7 @@ class SafeRAGAgent:
             result = self.agent.invoke({
                 "messages": [{"role": "user", "content": filtered_query}]
             })
-            
-            # 提取回答
-            if isinstance(result, dict) and "messages" in result:
-                messages = result["messages"]
-                if messages:
-                    answer = messages[-1].content if hasattr(messages[-1], 'content') else str(messages[-1])
-                else:
-                    answer = str(result)
-            else:
-                answer = str(result)
+            answer = _final_answer(result)
             
         except Exception as e:
             logger.error(f"❌ Agent 执行失败: {e}")
@@ -236,26 +298,7 @@ class SafeRAGAgent:
         sources = self._extract_sources(result)
         
         # 4. 输出验证
-        if self.output_validator:
-            validation_result = self.output_validator.validate(
-                answer,
-                sources=sources,
-            )
-            
-            if not validation_result.is_valid:
-                error_msg = "输出验证失败:\n" + "\n".join(
-                    f"- {err}" for err in validation_result.errors
-                )
-                logger.error(f"❌ {error_msg}")
-                raise ValueError(error_msg)
-            
-            # 使用过滤后的输出
-            filtered_answer = validation_result.filtered_output
-            
-            if validation_result.warnings:
-                logger.warning(f"⚠️ 输出警告: {validation_result.warnings}")
-        else:
-            filtered_answer = answer
+        filtered_answer = self._validate_output(answer, sources)
         
         # 5. 返回结果
         logger.info("✅ 安全查询完成")
@@ -316,16 +359,7 @@ class SafeRAGAgent:
             result = await self.agent.ainvoke({
                 "messages": [{"role": "user", "content": filtered_query}]
             })
-            
-            # 提取回答
-            if isinstance(result, dict) and "messages" in result:
-                messages = result["messages"]
-                if messages:
-                    answer = messages[-1].content if hasattr(messages[-1], 'content') else str(messages[-1])
-                else:
-                    answer = str(result)
-            else:
-                answer = str(result)
+            answer = _final_answer(result)
             
         except Exception as e:
             logger.error(f"❌ Agent 执行失败: {e}")
@@ -335,25 +369,7 @@ class SafeRAGAgent:
         sources = self._extract_sources(result)
         
         # 4. 输出验证
-        if self.output_validator:
-            validation_result = self.output_validator.validate(
-                answer,
-                sources=sources,
-            )
-            
-            if not validation_result.is_valid:
-                error_msg = "输出验证失败:\n" + "\n".join(
-                    f"- {err}" for err in validation_result.errors
-                )
-                logger.error(f"❌ {error_msg}")
-                raise ValueError(error_msg)
-            
-            filtered_answer = validation_result.filtered_output
-            
-            if validation_result.warnings:
-                logger.warning(f"⚠️ 输出警告: {validation_result.warnings}")
-        else:
-            filtered_answer = answer
+        filtered_answer = self._validate_output(answer, sources)
         
         # 5. 返回结果
         logger.info("✅ 异步安全查询完成")
@@ -374,15 +390,64 @@ class SafeRAGAgent:
                 "sources": sources,
             }
     
+    def _validate_output(self, answer: str, sources: List[str]) -> str:
+        """
+        验证输出并返回过滤后的回答
+        
+        相同的回答和来源已经验证过时直接返回缓存结果。
+        
+        Raises:
+            ValueError: 输出验证失败
+        """
+        if not self.output_validator:
+            return answer
+        
+        fingerprint = _fingerprint(answer)
+        cached = self._validated.get(fingerprint)
+        if cached is not None and cached.sources == tuple(sources):
+            self._validated.move_to_end(fingerprint)
+            return cached.answer
+        
+        validation_result = self.output_validator.validate(
+            answer,
+            sources=sources,
+        )
+        
+        if not validation_result.is_valid:
+            error_msg = "输出验证失败:\n" + "\n".join(
+                f"- {err}" for err in validation_result.errors
+            )
+            logger.error(f"❌ {error_msg}")
+            raise ValueError(error_msg)
+        
+        if validation_result.warnings:
+            logger.warning(f"⚠️ 输出警告: {validation_result.warnings}")
+        
+        # 使用过滤后的输出
+        filtered_answer = validation_result.filtered_output
+        self._validated[fingerprint] = _ValidatedResponse(
+            answer=filtered_answer,
+            sources=tuple(sources),
+            hash=fingerprint,
+        )
+        if len(self._validated) > _VALIDATED_CACHE_SIZE:
+            self._validated.popitem(last=False)
+        
+        return filtered_answer
+    
     def stream(self, query: str):
         """
         流式查询（带安全检查）
         
+        输出按 chunk 增量脱敏后立即返回，无需等待完整回答。
+        为处理跨 chunk 的敏感信息（如被切开的邮箱），缓冲区末尾
+        最多保留 64 个字符，待下一个 chunk 到达后再输出。
+        
         Args:
             query: 查询问题
             
         Yields:
-            流式输出的内容块
+            脱敏后的文本片段
         """
         logger.info(f"🔍 流式安全查询: {query[:50]}...")
         
@@ -402,35 +467,123 @@ class SafeRAGAgent:
             filtered_query = query
         
         # 流式执行
+        buffer = ""
         try:
-            for chunk in self.agent.stream({
-                "messages": [{"role": "user", "content": filtered_query}]
-            }):
-                yield chunk
+            for chunk in self.agent.stream(
+                {"messages": [{"role": "user", "content": filtered_query}]},
+                stream_mode="messages",
+            ):
+                text = _extract_text(chunk)
+                if not text:
+                    continue
+                
+                buffer += text
+                masked, buffer = self._stream_mask(buffer)
+                if masked:
+                    yield masked
+            
+            # 输出剩余缓冲区
+            if buffer:
+                yield self._mask(buffer)
         except Exception as e:
             logger.error(f"❌ 流式查询失败: {e}")
             raise
     
+    async def astream(self, query: str):
+        """
+        异步流式查询（带安全检查）
+        
+        与 stream 相同的增量脱敏逻辑。调用方提前结束迭代并调用 aclose() 时，
+        底层 Agent 的流也会被关闭，不再继续生成。
+        
+        Args:
+            query: 查询问题
+            
+        Yields:
+            脱敏后的文本片段
+        """
+        logger.info(f"🔍 异步流式安全查询: {query[:50]}...")
+        
+        # 输入验证
+        if self.input_validator:
+            validation_result = self.input_validator.validate(query)
+            
+            if not validation_result.is_valid:
+                error_msg = "输入验证失败:\n" + "\n".join(
+                    f"- {err}" for err in validation_result.errors
+                )
+                logger.error(f"❌ {error_msg}")
+                raise ValueError(error_msg)
+            
+            filtered_query = validation_result.filtered_input
+        else:
+            filtered_query = query
+        
+        # 流式执行
+        buffer = ""
+        stream = self.agent.astream(
+            {"messages": [{"role": "user", "content": filtered_query}]},
+            stream_mode="messages",
+        )
+        try:
+            async for chunk in stream:
+                text = _extract_text(chunk)
+                if not text:
+                    continue
+                
+                buffer += text
+                masked, buffer = self._stream_mask(buffer)
+                if masked:
+                    yield masked
+            
+            # 输出剩余缓冲区
+            if buffer:
+                yield self._mask(buffer)
+        except Exception as e:
+            logger.error(f"❌ 异步流式查询失败: {e}")
+            raise
+        finally:
+            await stream.aclose()
+    
+    def _stream_mask(self, buffer: str) -> tuple[str, str]:
+        """
+        对流式缓冲区进行增量脱敏
+        
+        Args:
+            buffer: 当前缓冲区文本
+            
+        Returns:
+            (可以输出的脱敏文本, 保留到下一轮的缓冲区)
+        """
+        cut = len(buffer) - _STREAM_HOLDBACK
+        if cut <= 0:
+            return "", buffer
+        
+        # 切分点不能落在敏感信息中间
+        for match in _PII_RE.finditer(buffer):
+            if match.start() < cut < match.end():
+                cut = match.start()
+                break
+            if match.start() >= cut:
+                break
+        
+        return self._mask(buffer[:cut]), buffer[cut:]
+    
+    def _mask(self, text: str) -> str:
+        """使用输出验证器的内容过滤器脱敏（未启用时原样返回）"""
+        if self.output_validator is None:
+            return text
+        content_filter = self.output_validator.content_filter
+        if not (content_filter.enable_pii_detection and content_filter.mask_pii):
+            return text
+        return content_filter._mask_pii(text)
+    
     def _extract_sources(self, result: Any) -> List[str]:
         """从 Agent 结果中提取来源"""
         sources = []
         
-        # 尝试从结果中提取来源信息
         if isinstance(result, dict):
-            # 检查是否有 intermediate_steps
-            if "intermediate_steps" in result:
-                for step in result["intermediate_steps"]:
-                    if len(step) >= 2:
-                        action, observation = step[0], step[1]
-                        
-                        # 如果是检索工具的结果
-                        if hasattr(action, "tool") and "knowledge" in action.tool.lower():
-                            if isinstance(observation, list):
-                                for doc in observation:
-                                    if hasattr(doc, "metadata") and doc.metadata:
-                                        source = doc.metadata.get("source") or doc.metadata.get("filename")
-                                        if source and source not in sources:
-                                            sources.append(source)
+            sources = self._extract(result)
             
             # 检查是否有 sources 字段
             if "sources" in result:
@@ -442,6 +595,37 @@ class SafeRAGAgent:
         
         return sources
     
+    def _extract_from_messages(self, result: Dict[str, Any]) -> List[str]:
+        """从检索工具的 ToolMessage 中提取来源（LangGraph Agent）"""
+        sources = {}
+        
+        for message in result.get("messages", ()):
+            if isinstance(message, ToolMessage) and message.name == RETRIEVER_TOOL_NAME:
+                for source in TOOL_SOURCE_RE.findall(str(message.content)):
+                    if source != "未知来源":
+                        sources[source] = None
+        
+        return list(sources)
+    
+    def _extract_from_steps(self, result: Dict[str, Any]) -> List[str]:
+        """从 intermediate_steps 中提取来源（旧式 AgentExecutor）"""
+        sources = {}
+        
+        for step in result.get("intermediate_steps", ()):
+            if len(step) >= 2:
+                action, observation = step[0], step[1]
+                
+                # 如果是检索工具的结果
+                if hasattr(action, "tool") and "knowledge" in action.tool.lower():
+                    if isinstance(observation, list):
+                        for doc in observation:
+                            if hasattr(doc, "metadata") and doc.metadata:
+                                source = doc.metadata.get("source") or doc.metadata.get("filename")
+                                if source:
+                                    sources[source] = None
+        
+        return list(sources)
+    
     def invoke(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """兼容原始 Agent 的 invoke 接口"""
         if isinstance(input_data, dict) and "messages" in input_data:
@@ -0,0 +1,148 @@
+"""
+语义缓存模块
+
+缓存 RAG 查询的回答：新问题与历史问题的向量余弦相似度达到阈值时，
+直接返回历史回答，跳过检索和 LLM 生成。
+
+- 查询向量经 L2 归一化后保存在矩阵中，内积即余弦相似度
+- 超过容量时淘汰最久未命中的条目（LRU）
+- 可选持久化到本地 pickle 文件，跨进程复用
+"""
+
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SemanticCache:
+    """
+    基于查询向量相似度的回答缓存
+    
+    Example:
+        >>> cache = SemanticCache("~/.cache/lc-studylab/semcache/my_docs.pkl")
+        >>> vector = embeddings.embed_query("什么是 RAG？")
+        >>> hit = cache.lookup(vector)
+        >>> if hit is None:
+        ...     result = query_rag_agent(agent, "什么是 RAG？")
+        ...     cache.add(vector, result["answer"], result["sources"])
+        ...     cache.save()
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = 0.95,
+        max_entries: int = 1000,
+    ):
+        """
+        初始化语义缓存
+        
+        Args:
+            path: 持久化文件路径，None 表示只在内存中缓存
+            threshold: 命中所需的最小余弦相似度
+            max_entries: 最大缓存条目数
+        """
+        self.path = Path(path).expanduser() if path else None
+        self.threshold = threshold
+        self.max_entries = max_entries
+        
+        self._vectors: Optional[np.ndarray] = None
+        self._records: List[Dict[str, Any]] = []
+        
+        if self.path is not None and self.path.exists():
+            self._load()
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        """转换为 float32 并 L2 归一化"""
+        vector = np.asarray(vector, dtype="float32")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def lookup(self, vector) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        查找与查询向量最相似的缓存条目
+        
+        Args:
+            vector: 查询向量
+        
+        Returns:
+            (记录, 相似度)，未命中返回 None。记录包含 answer、sources、ts
+        """
+        if not self._records:
+            return None
+        
+        query = self._normalize(vector)
+        if query.shape[0] != self._vectors.shape[1]:
+            return None
+        
+        similarities = self._vectors @ query
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        
+        if similarity < self.threshold:
+            return None
+        
+        record = self._records[best]
+        record["ts"] = time.time()
+        return record, similarity
+    
+    def add(self, vector, answer: str, sources: Optional[List[str]] = None) -> None:
+        """
+        添加缓存条目，超过容量时淘汰最久未使用的条目
+        
+        Args:
+            vector: 查询向量
+            answer: 回答
+            sources: 来源列表
+        """
+        row = self._normalize(vector)[None, :]
+        record = {"answer": answer, "sources": list(sources or []), "ts": time.time()}
+        
+        if self._vectors is None or row.shape[1] != self._vectors.shape[1]:
+            # 首次写入或 embedding 模型维度变化，重建缓存
+            self._vectors = row
+            self._records = [record]
+            return
+        
+        if len(self._records) >= self.max_entries:
+            oldest = min(range(len(self._records)), key=lambda i: self._records[i]["ts"])
+            self._vectors[oldest] = row[0]
+            self._records[oldest] = record
+        else:
+            self._vectors = np.vstack([self._vectors, row])
+            self._records.append(record)
+    
+    def save(self) -> None:
+        """持久化到 path（未设置 path 时忽略）"""
+        if self.path is None:
+            return
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "wb") as f:
+            pickle.dump({"vectors": self._vectors, "records": self._records}, f)
+        
+        logger.debug(f"💾 保存语义缓存: {self.path} ({len(self._records)} 条)")
+    
+    def _load(self) -> None:
+        """从 path 加载，文件损坏时从空缓存开始"""
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+            self._vectors = data["vectors"]
+            self._records = data["records"]
+            logger.debug(f"📂 加载语义缓存: {self.path} ({len(self._records)} 条)")
+        except Exception as e:
+            logger.warning(f"加载语义缓存失败，将重新创建: {e}")
+            self._vectors = None
+            self._records = []
@@ -13,16 +13,28 @@
 - https://reference.langchain.com/python/langchain_text_splitters/
 """
 
-from typing import List, Optional, Literal
+import copy
+import hashlib
+import struct
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from types import MappingProxyType
+from typing import Final, List, Mapping, Optional, Literal
 from langchain_core.documents import Document
 from langchain_text_splitters import (
     RecursiveCharacterTextSplitter,
     CharacterTextSplitter,
-    MarkdownTextSplitter,
-    TokenTextSplitter,
 )
 
-from config import settings, get_logger
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from config import settings, get_logger, is_log_enabled
 
 logger = get_logger(__name__)
 
@@ -30,6 +42,92 @@ logger = get_logger(__name__)
 # 分块器类型
 SplitterType = Literal["recursive", "character", "markdown", "token"]
 
+# 文档数少于该值时直接串行分块，避免进程池的启动开销
+_PARALLEL_SPLIT_THRESHOLD = 32
+
+# split_text 结果缓存：内容哈希 -> 分块文本列表（LRU）
+_SPLIT_CACHE_SIZE = 128
+_split_cache: "OrderedDict[bytes, List[str]]" = OrderedDict()
+
+# 不同类型文档的推荐分块参数 (chunk_size, chunk_overlap)，只读
+_CHUNK_RECOMMENDATIONS: Final[Mapping[str, tuple[int, int]]] = MappingProxyType({
+    "general": (1000, 200),      # 通用文档
+    "code": (1500, 300),          # 代码需要更大的上下文
+    "markdown": (800, 150),       # Markdown 通常结构清晰
+    "academic": (1200, 250),      # 学术论文需要保持上下文
+    "chat": (500, 50),            # 对话记录可以更小
+})
+
+# 参与缓存键计算的分块器类型编号
+_SPLITTER_KIND_IDS = {"recursive": 0, "character": 1, "markdown": 2, "token": 3}
+
+
+class FastRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
+    """
+    使用 str.split 代替 re.split 的递归字符分块器
+    
+    分隔符不是正则（is_separator_regex=False）时，按字面量选择和切分分隔符，
+    避免每层递归都构造正则并扫描文本；分块结果与父类一致。
+    """
+    
+    def _split_text(self, text: str, separators: List[str]) -> List[str]:
+        if self._is_separator_regex:
+            return super()._split_text(text, separators)
+        
+        final_chunks = []
+        
+        # 选择文本中出现的第一个分隔符
+        separator = separators[-1]
+        new_separators = []
+        for i, _s in enumerate(separators):
+            if _s == "":
+                separator = _s
+                break
+            if _s in text:
+                separator = _s
+                new_separators = separators[i + 1:]
+                break
+        
+        splits = _split_text_with_literal(text, separator, self._keep_separator)
+        
+        # 合并小块，递归切分过长的块
+        _good_splits = []
+        _separator = "" if self._keep_separator else separator
+        for s in splits:
+            if self._length_function(s) < self._chunk_size:
+                _good_splits.append(s)
+            else:
+                if _good_splits:
+                    final_chunks.extend(self._merge_splits(_good_splits, _separator))
+                    _good_splits = []
+                if not new_separators:
+                    final_chunks.append(s)
+                else:
+                    final_chunks.extend(self._split_text(s, new_separators))
+        if _good_splits:
+            final_chunks.extend(self._merge_splits(_good_splits, _separator))
+        return final_chunks
+
+
+def _split_text_with_literal(
+    text: str,
+    separator: str,
+    keep_separator: bool | Literal["start", "end"],
+) -> List[str]:
+    """按字面量分隔符切分文本，语义与 langchain 的 _split_text_with_regex 相同"""
+    if not separator:
+        return list(text)
+    
+    parts = text.split(separator)
+    if keep_separator == "end":
+        splits = [part + separator for part in parts[:-1]] + parts[-1:]
+    elif keep_separator:
+        splits = parts[:1] + [separator + part for part in parts[1:]]
+    else:
+        splits = parts
+    
+    return [s for s in splits if s]
+
 
 def get_text_splitter(
     splitter_type: SplitterType = "recursive",
@@ -71,6 +169,35 @@ def get_text_splitter(
     chunk_size = chunk_size or settings.chunk_size
     chunk_overlap = chunk_overlap or settings.chunk_overlap
     
+    # 分块器是无状态的，相同参数复用同一个实例
+    kwargs_key = tuple(sorted(kwargs.items()))
+    try:
+        hash(kwargs_key)
+    except TypeError:
+        # kwargs 中含不可哈希的值（如 separators 列表），不走缓存
+        return _build_splitter(splitter_type, chunk_size, chunk_overlap, **kwargs)
+    
+    return _get_cached_splitter(splitter_type, chunk_size, chunk_overlap, kwargs_key)
+
+
+@lru_cache(maxsize=32)
+def _get_cached_splitter(
+    splitter_type: SplitterType,
+    chunk_size: int,
+    chunk_overlap: int,
+    kwargs_key: tuple,
+):
+    """按参数缓存分块器实例"""
+    return _build_splitter(splitter_type, chunk_size, chunk_overlap, **dict(kwargs_key))
+
+
+def _build_splitter(
+    splitter_type: SplitterType,
+    chunk_size: int,
+    chunk_overlap: int,
+    **kwargs,
+):
+    """创建分块器实例"""
     logger.debug(
         f"创建文本分块器: type={splitter_type}, "
         f"chunk_size={chunk_size}, chunk_overlap={chunk_overlap}"
@@ -79,7 +206,7 @@ def get_text_splitter(
     if splitter_type == "recursive":
         # 递归字符分块器（推荐）
         # 会尝试按照 \n\n, \n, 空格等分隔符递归分割
-        return RecursiveCharacterTextSplitter(
+        return FastRecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
             length_function=len,
@@ -101,6 +228,8 @@ def get_text_splitter(
     elif splitter_type == "markdown":
         # Markdown 专用分块器
         # 会按照 Markdown 的标题层级进行分割
+        from langchain_text_splitters import MarkdownTextSplitter
+        
         return MarkdownTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -109,7 +238,9 @@ def get_text_splitter(
     
     elif splitter_type == "token":
         # 基于 Token 的分块器
-        # 使用 tiktoken 计算 token 数量
+        # 使用 tiktoken 计算 token 数量（按需导入，避免冷启动加载 tiktoken）
+        from langchain_text_splitters import TokenTextSplitter
+        
         return TokenTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -128,16 +259,22 @@ def split_documents(
     splitter_type: SplitterType = "recursive",
     chunk_size: Optional[int] = None,
     chunk_overlap: Optional[int] = None,
+    max_workers: int = 1,
     **kwargs,
 ) -> List[Document]:
     """
     分块文档列表
     
+    默认在当前进程中串行分块。显式传入 max_workers > 1 且文档较多时，
+    分片后使用进程池并行分块（绕过 GIL），结果保持原始文档顺序。
+    进程池仅适合 CLI、离线脚本等批处理场景，服务进程内应保持默认值。
+    
     Args:
         documents: 文档列表
         splitter_type: 分块器类型
         chunk_size: 分块大小
         chunk_overlap: 分块重叠大小
+        max_workers: 并行分块的进程数，默认为 1（串行分块）
         **kwargs: 其他参数
         
     Returns:
@@ -163,26 +300,35 @@ def split_documents(
     
     logger.info(f"📝 开始分块: {len(documents)} 个文档")
     
-    # 获取分块器
-    splitter = get_text_splitter(
-        splitter_type=splitter_type,
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        **kwargs,
-    )
+    workers = min(max_workers, len(documents))
     
     # 执行分块
     try:
-        chunks = splitter.split_documents(documents)
+        if workers > 1 and len(documents) >= _PARALLEL_SPLIT_THRESHOLD:
+            logger.debug(f"   并行分块: {workers} 个进程")
+            chunks = _split_documents_parallel(
+                documents,
+                workers,
+                (splitter_type, chunk_size, chunk_overlap, kwargs),
+            )
+        else:
+            splitter = get_text_splitter(
+                splitter_type=splitter_type,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                **kwargs,
+            )
+            chunks = splitter.split_documents(documents)
         
         logger.info(f"✅ 分块完成: {len(chunks)} 个文本块")
         
-        # 统计信息
-        total_chars = sum(len(chunk.page_content) for chunk in chunks)
-        avg_chars = total_chars / len(chunks) if chunks else 0
-        
-        logger.info(f"   平均块大小: {avg_chars:.0f} 字符")
-        logger.info(f"   总字符数: {total_chars}")
+        # 统计信息（仅在 INFO 日志会输出时才遍历计算）
+        if is_log_enabled("INFO"):
+            total_chars = sum(len(chunk.page_content) for chunk in chunks)
+            avg_chars = total_chars / len(chunks) if chunks else 0
+            
+            logger.info(f"   平均块大小: {avg_chars:.0f} 字符")
+            logger.info(f"   总字符数: {total_chars}")
         
         return chunks
         
@@ -191,6 +337,44 @@ def split_documents(
         raise
 
 
+# 工作进程内的分块器，由进程池 initializer 在进程启动时创建
+_WORKER_SPLITTER = None
+
+
+def _worker_init(splitter_args: tuple) -> None:
+    """进程池 initializer：每个工作进程只创建一次分块器"""
+    global _WORKER_SPLITTER
+    splitter_type, chunk_size, chunk_overlap, kwargs = splitter_args
+    _WORKER_SPLITTER = get_text_splitter(splitter_type, chunk_size, chunk_overlap, **kwargs)
+
+
+def _split_shard(shard: List[Document]) -> List[List[Document]]:
+    """在工作进程中分块一组文档，按文档分别返回分块结果"""
+    return [_WORKER_SPLITTER.split_documents([doc]) for doc in shard]
+
+
+def _split_documents_parallel(
+    documents: List[Document],
+    workers: int,
+    splitter_args: tuple,
+) -> List[Document]:
+    """使用进程池并行分块文档"""
+    # 轮询分片，使各进程负载均衡
+    shards = [documents[i::workers] for i in range(workers)]
+    
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_worker_init,
+        initargs=(splitter_args,),
+    ) as executor:
+        results = list(executor.map(_split_shard, shards))
+    
+    # 第 i 个文档位于第 i % workers 个分片的第 i // workers 位
+    return list(chain.from_iterable(
+        results[i % workers][i // workers] for i in range(len(documents))
+    ))
+
+
 def split_text(
     text: str,
     splitter_type: SplitterType = "recursive",
@@ -227,6 +411,9 @@ def split_text(
     
     logger.info(f"📝 开始分块文本: {len(text)} 字符")
     
+    chunk_size = chunk_size or settings.chunk_size
+    chunk_overlap = chunk_overlap or settings.chunk_overlap
+    
     # 获取分块器
     splitter = get_text_splitter(
         splitter_type=splitter_type,
@@ -237,12 +424,23 @@ def split_text(
     
     # 执行分块
     try:
-        # 使用 create_documents 方法，可以添加元数据
-        metadatas = [metadata] if metadata else None
-        chunks = splitter.create_documents(
-            texts=[text],
-            metadatas=metadatas,
-        )
+        if kwargs or splitter_type not in _SPLITTER_KIND_IDS:
+            # 额外参数可能改变分块结果（如 add_start_index），不走缓存
+            # 使用 create_documents 方法，可以添加元数据
+            metadatas = [metadata] if metadata else None
+            chunks = splitter.create_documents(
+                texts=[text],
+                metadatas=metadatas,
+            )
+        else:
+            # 只缓存分块文本，元数据每次重新附加，不在调用之间共享 Document
+            texts = _split_text_cached(
+                splitter, text, splitter_type, chunk_size, chunk_overlap
+            )
+            chunks = [
+                Document(page_content=chunk_text, metadata=copy.deepcopy(metadata or {}))
+                for chunk_text in texts
+            ]
         
         logger.info(f"✅ 分块完成: {len(chunks)} 个文本块")
         
@@ -253,6 +451,33 @@ def split_text(
         raise
 
 
+def _split_text_cached(
+    splitter,
+    text: str,
+    splitter_type: SplitterType,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> List[str]:
+    """按 (文本内容, 分块参数) 的哈希缓存分块结果"""
+    params = struct.pack(
+        "IIB", chunk_size, chunk_overlap, _SPLITTER_KIND_IDS[splitter_type]
+    )
+    key = hashlib.blake2b(text.encode(), digest_size=16, key=params).digest()
+    
+    texts = _split_cache.get(key)
+    if texts is not None:
+        _split_cache.move_to_end(key)
+        logger.debug("   命中分块缓存")
+        return texts
+    
+    texts = splitter.split_text(text)
+    _split_cache[key] = texts
+    if len(_split_cache) > _SPLIT_CACHE_SIZE:
+        _split_cache.popitem(last=False)
+    
+    return texts
+
+
 def get_optimal_chunk_size(
     document_type: str = "general",
 ) -> tuple[int, int]:
@@ -277,22 +502,15 @@ def get_optimal_chunk_size(
         ...     chunk_overlap=overlap
         ... )
     """
-    # 不同类型文档的推荐参数
-    recommendations = {
-        "general": (1000, 200),      # 通用文档
-        "code": (1500, 300),          # 代码需要更大的上下文
-        "markdown": (800, 150),       # Markdown 通常结构清晰
-        "academic": (1200, 250),      # 学术论文需要保持上下文
-        "chat": (500, 50),            # 对话记录可以更小
-    }
-    
-    if document_type not in recommendations:
+    recommendation = _CHUNK_RECOMMENDATIONS.get(document_type)
+    
+    if recommendation is None:
         logger.warning(
             f"未知的文档类型: {document_type}，使用默认参数"
         )
-        return recommendations["general"]
+        return _CHUNK_RECOMMENDATIONS["general"]
     
-    chunk_size, overlap = recommendations[document_type]
+    chunk_size, overlap = recommendation
     logger.info(
         f"📊 推荐的分块参数 ({document_type}): "
         f"chunk_size={chunk_size}, overlap={overlap}"
@@ -325,16 +543,39 @@ def analyze_chunks(chunks: List[Document]) -> dict:
             "max_chunk_size": 0,
         }
     
-    chunk_sizes = [len(chunk.page_content) for chunk in chunks]
-    total_chars = sum(chunk_sizes)
-    
-    stats = {
-        "total_chunks": len(chunks),
-        "total_chars": total_chars,
-        "avg_chunk_size": total_chars / len(chunks),
-        "min_chunk_size": min(chunk_sizes),
-        "max_chunk_size": max(chunk_sizes),
-    }
+    if NUMPY_AVAILABLE:
+        # 一次取长度，聚合在 C 层完成
+        sizes = np.fromiter(
+            (len(chunk.page_content) for chunk in chunks),
+            dtype=np.int64,
+            count=len(chunks),
+        )
+        stats = {
+            "total_chunks": len(chunks),
+            "total_chars": int(sizes.sum()),
+            "avg_chunk_size": float(sizes.mean()),
+            "min_chunk_size": int(sizes.min()),
+            "max_chunk_size": int(sizes.max()),
+        }
+    else:
+        # 单次遍历同时统计总和与最值，不构建中间长度列表
+        total_chars = 0
+        min_size = max_size = len(chunks[0].page_content)
+        for chunk in chunks:
+            size = len(chunk.page_content)
+            total_chars += size
+            if size < min_size:
+                min_size = size
+            elif size > max_size:
+                max_size = size
+        
+        stats = {
+            "total_chunks": len(chunks),
+            "total_chars": total_chars,
+            "avg_chunk_size": total_chars / len(chunks),
+            "min_chunk_size": min_size,
+            "max_chunk_size": max_size,
+        }
     
     logger.info("📊 分块统计:")
     logger.info(f"   总块数: {stats['total_chunks']}")
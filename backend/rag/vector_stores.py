@@ -11,7 +11,14 @@
 - https://reference.langchain.com/python/langchain_community/vectorstores/
 """
 
+import asyncio
+import math
 import os
+import pickle
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
 from typing import List, Optional, Literal
 from langchain_core.documents import Document
@@ -19,6 +26,9 @@ from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore, InMemoryVectorStore
 
 try:
+    import faiss
+    import numpy as np
+    from langchain_community.docstore.in_memory import InMemoryDocstore
     from langchain_community.vectorstores import FAISS
     FAISS_AVAILABLE = True
 except ImportError:
@@ -32,20 +42,114 @@ logger = get_logger(__name__)
 # 向量库类型
 VectorStoreType = Literal["faiss", "inmemory"]
 
+# FAISS 索引类型
+FaissIndexType = Literal["flat", "hnsw", "ivfpq"]
+
+# HNSW 每个节点的邻居数
+_HNSW_M = 32
+
+# IVF-PQ 子量化器数量和每个子向量的编码位数
+_PQ_M = 16
+_PQ_NBITS = 8
+
+# IVF-PQ 训练时最多采样的向量数
+_IVF_TRAIN_SAMPLE = 100_000
+
+# 查询向量缓存容量
+_QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# (嵌入模型标识, 查询文本) -> 查询向量
+_query_embedding_cache: "OrderedDict[tuple, List[float]]" = OrderedDict()
+
+
+async def aembed_in_batches(
+    embeddings: Embeddings,
+    texts: List[str],
+    batch_size: int = 64,
+    max_concurrency: int = 8,
+) -> List[List[float]]:
+    """
+    分批并发计算文本向量
+    
+    将文本按 batch_size 切分，最多 max_concurrency 个批次同时请求
+    Embedding 服务，结果保持输入顺序。
+    
+    Args:
+        embeddings: Embedding 模型
+        texts: 文本列表
+        batch_size: 每批文本数量
+        max_concurrency: 最大并发批次数
+        
+    Returns:
+        向量列表，与 texts 一一对应
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    
+    async def embed_batch(index: int, batch: List[str]) -> List[List[float]]:
+        async with semaphore:
+            vectors = await embeddings.aembed_documents(batch)
+        logger.debug(f"   Embedding 批次 {index + 1}/{len(batches)} 完成")
+        return vectors
+    
+    results = await asyncio.gather(
+        *(embed_batch(i, batch) for i, batch in enumerate(batches))
+    )
+    return list(chain.from_iterable(results))
+
+
+def embed_in_batches(
+    embeddings: Embeddings,
+    texts: List[str],
+    batch_size: int = 64,
+    max_concurrency: int = 8,
+) -> List[List[float]]:
+    """
+    aembed_in_batches 的同步版本
+    
+    已有事件循环运行时（如在 FastAPI 中调用），在独立线程中执行。
+    """
+    coro = aembed_in_batches(embeddings, texts, batch_size, max_concurrency)
+    
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
 
 def create_vector_store(
     documents: List[Document],
     embeddings: Embeddings,
     store_type: Optional[VectorStoreType] = None,
+    batch_size: int = 64,
+    max_concurrency: int = 8,
+    index_type: FaissIndexType = "flat",
+    quantize: bool = False,
+    vectors: Optional[List[List[float]]] = None,
     **kwargs,
 ) -> VectorStore:
     """
     从文档创建向量存储
     
+    FAISS 向量库的 embeddings 会先分批并发计算，再一次性构建索引。
+    传入 vectors 时直接使用预先计算好的向量，不再调用 embedding 模型。
+    
     Args:
         documents: 文档列表
         embeddings: Embedding 模型
         store_type: 向量库类型，默认使用配置中的类型
+        batch_size: 每批计算 embedding 的文档数量
+        max_concurrency: 最大并发 embedding 请求数
+        index_type: FAISS 索引类型（仅用于 faiss）
+            - "flat": 精确检索（默认），适合中小规模语料
+            - "hnsw": HNSW 图索引，检索复杂度约为 O(log N)
+            - "ivfpq": IVF + 乘积量化，内存占用约为 flat 的 1/8 ~ 1/16
+        quantize: 是否使用 8-bit 标量量化（SQ8）存储向量，内存和带宽约为
+            FP32 的 1/4，召回率损失通常小于 1%（适用于 flat 和 hnsw）
+        vectors: 与 documents 一一对应的预计算向量（可选）
         **kwargs: 其他传递给向量库的参数
         
     Returns:
@@ -70,6 +174,11 @@ def create_vector_store(
     if not documents:
         raise ValueError("文档列表不能为空")
     
+    if vectors is not None and len(vectors) != len(documents):
+        raise ValueError(
+            f"向量数量 ({len(vectors)}) 与文档数量 ({len(documents)}) 不一致"
+        )
+    
     store_type = store_type or settings.vector_store_type
     
     logger.info(f"🗄️  创建向量存储: type={store_type}, documents={len(documents)}")
@@ -81,19 +190,57 @@ def create_vector_store(
                     "FAISS 未安装。请运行: pip install faiss-cpu"
                 )
             
-            vector_store = FAISS.from_documents(
-                documents=documents,
-                embedding=embeddings,
-                **kwargs,
+            texts = [doc.page_content for doc in documents]
+            if vectors is None:
+                vectors = embed_in_batches(embeddings, texts, batch_size, max_concurrency)
+            
+            metadatas = [doc.metadata for doc in documents]
+            
+            if index_type == "flat" and not quantize:
+                vector_store = FAISS.from_embeddings(
+                    text_embeddings=list(zip(texts, vectors)),
+                    embedding=embeddings,
+                    metadatas=metadatas,
+                    **kwargs,
+                )
+            else:
+                index = _build_faiss_index(
+                    np.asarray(vectors, dtype="float32"),
+                    index_type,
+                    quantize,
+                )
+                vector_store = FAISS(
+                    embedding_function=embeddings,
+                    index=index,
+                    docstore=InMemoryDocstore(),
+                    index_to_docstore_id={},
+                    **kwargs,
+                )
+                vector_store.add_embeddings(
+                    text_embeddings=list(zip(texts, vectors)),
+                    metadatas=metadatas,
+                )
+            logger.info(
+                f"✅ FAISS 向量库创建成功 (index_type={index_type}, quantize={quantize})"
             )
-            logger.info("✅ FAISS 向量库创建成功")
             
         elif store_type == "inmemory":
-            vector_store = InMemoryVectorStore.from_documents(
-                documents=documents,
-                embedding=embeddings,
-                **kwargs,
-            )
+            if vectors is None:
+                vector_store = InMemoryVectorStore.from_documents(
+                    documents=documents,
+                    embedding=embeddings,
+                    **kwargs,
+                )
+            else:
+                vector_store = InMemoryVectorStore(embedding=embeddings, **kwargs)
+                for doc, vector in zip(documents, vectors):
+                    doc_id = doc.id or str(uuid.uuid4())
+                    vector_store.store[doc_id] = {
+                        "id": doc_id,
+                        "vector": vector,
+                        "text": doc.page_content,
+                        "metadata": doc.metadata,
+                    }
             logger.info("✅ 内存向量库创建成功")
             
         else:
@@ -109,6 +256,66 @@ def create_vector_store(
         raise
 
 
+def _build_faiss_index(
+    vectors: "np.ndarray",
+    index_type: FaissIndexType,
+    quantize: bool = False,
+) -> "faiss.Index":
+    """
+    根据索引类型构建（并在需要时训练）空的 FAISS 索引
+    
+    Args:
+        vectors: 全部向量，形状为 (N, dim)
+        index_type: 索引类型
+        quantize: 是否使用 SQ8 标量量化
+        
+    Returns:
+        可直接 add 的 FAISS 索引
+    """
+    num, dim = vectors.shape
+    
+    if index_type == "flat":
+        if quantize:
+            index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+            index.train(vectors)
+            return index
+        return faiss.IndexFlatL2(dim)
+    
+    if index_type == "hnsw":
+        if quantize:
+            index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, _HNSW_M)
+            index.train(vectors)
+            return index
+        return faiss.IndexHNSWFlat(dim, _HNSW_M)
+    
+    if index_type == "ivfpq":
+        if quantize:
+            logger.info("   IVF-PQ 已经压缩向量，忽略 quantize 参数")
+        
+        nlist = max(1, int(4 * math.sqrt(num)))
+        
+        # PQ 训练至少需要 2^nbits 个样本，且向量维度必须能被子量化器数整除
+        if num < max(nlist, 2 ** _PQ_NBITS) or dim % _PQ_M:
+            logger.warning(
+                f"⚠️  向量数量 ({num}) 或维度 ({dim}) 不满足 IVF-PQ 要求，使用 flat 索引"
+            )
+            return faiss.IndexFlatL2(dim)
+        
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, _PQ_M, _PQ_NBITS)
+        
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(num, size=min(num, _IVF_TRAIN_SAMPLE), replace=False)]
+        logger.debug(f"   训练 IVF-PQ 索引: nlist={nlist}, samples={len(sample)}")
+        index.train(sample)
+        return index
+    
+    raise ValueError(
+        f"不支持的 FAISS 索引类型: {index_type}。"
+        f"支持的类型: flat, hnsw, ivfpq"
+    )
+
+
 def save_vector_store(
     vector_store: VectorStore,
     save_path: str,
@@ -160,6 +367,7 @@ def load_vector_store(
     load_path: str,
     embeddings: Embeddings,
     store_type: Optional[VectorStoreType] = None,
+    mmap: Optional[bool] = None,
     **kwargs,
 ) -> VectorStore:
     """
@@ -169,6 +377,10 @@ def load_vector_store(
         load_path: 加载路径
         embeddings: Embedding 模型
         store_type: 向量库类型，默认使用配置中的类型
+        mmap: 是否以只读内存映射方式打开 FAISS 索引。向量由操作系统按需
+            换入，多个进程（如多个 uvicorn worker）共享同一份物理内存。
+            映射后的索引是只读的，需要添加文档时不要开启。
+            默认使用配置项 rag_mmap（环境变量 RAG_MMAP）
         **kwargs: 其他传递给向量库的参数
         
     Returns:
@@ -193,6 +405,8 @@ def load_vector_store(
         raise FileNotFoundError(f"向量库路径不存在: {load_path}")
     
     store_type = store_type or settings.vector_store_type
+    if mmap is None:
+        mmap = settings.rag_mmap
     
     logger.info(f"📂 加载向量库: {load_path}")
     
@@ -203,13 +417,16 @@ def load_vector_store(
                     "FAISS 未安装。请运行: pip install faiss-cpu"
                 )
             
-            vector_store = FAISS.load_local(
-                folder_path=str(load_path),
-                embeddings=embeddings,
-                allow_dangerous_deserialization=True,  # 允许反序列化
-                **kwargs,
-            )
-            logger.info("✅ FAISS 向量库加载成功")
+            if mmap:
+                vector_store = _load_faiss_mmap(load_path, embeddings, **kwargs)
+            else:
+                vector_store = FAISS.load_local(
+                    folder_path=str(load_path),
+                    embeddings=embeddings,
+                    allow_dangerous_deserialization=True,  # 允许反序列化
+                    **kwargs,
+                )
+            logger.info(f"✅ FAISS 向量库加载成功 (mmap={mmap})")
             
         elif store_type == "inmemory":
             raise ValueError("InMemoryVectorStore 不支持从磁盘加载")
@@ -227,16 +444,45 @@ def load_vector_store(
         raise
 
 
+def _load_faiss_mmap(
+    load_path: Path,
+    embeddings: Embeddings,
+    index_name: str = "index",
+    **kwargs,
+) -> "FAISS":
+    """以只读内存映射方式加载 save_local 保存的 FAISS 向量库"""
+    index = faiss.read_index(
+        str(load_path / f"{index_name}.faiss"),
+        faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,
+    )
+    
+    with open(load_path / f"{index_name}.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+        **kwargs,
+    )
+
+
 def add_documents_to_vector_store(
     vector_store: VectorStore,
     documents: List[Document],
+    vectors: Optional[List[List[float]]] = None,
 ) -> None:
     """
     向现有向量库添加文档
     
+    传入 vectors 时，FAISS 向量库通过 add_embeddings 直接写入预计算向量，
+    不再调用 embedding 模型；其他向量库仍由 add_documents 计算向量。
+    
     Args:
         vector_store: 向量存储实例
         documents: 要添加的文档列表
+        vectors: 与 documents 一一对应的预计算向量（可选）
         
     Example:
         >>> # 加载现有向量库
@@ -254,10 +500,19 @@ def add_documents_to_vector_store(
         logger.warning("文档列表为空，无需添加")
         return
     
+    if vectors is not None and len(vectors) != len(documents):
+        raise ValueError(f"向量数量 ({len(vectors)}) 与文档数量 ({len(documents)}) 不一致")
+    
     logger.info(f"➕ 向向量库添加文档: {len(documents)} 个")
     
     try:
-        vector_store.add_documents(documents)
+        if vectors is not None and FAISS_AVAILABLE and isinstance(vector_store, FAISS):
+            vector_store.add_embeddings(
+                text_embeddings=list(zip((doc.page_content for doc in documents), vectors)),
+                metadatas=[doc.metadata for doc in documents],
+            )
+        else:
+            vector_store.add_documents(documents)
         logger.info("✅ 文档添加成功")
         
     except Exception as e:
@@ -265,6 +520,126 @@ def add_documents_to_vector_store(
         raise
 
 
+async def add_documents_to_vector_store_batched(
+    vector_store: VectorStore,
+    documents: List[Document],
+    batch_size: int = 64,
+    max_concurrency: int = 8,
+) -> None:
+    """
+    分批并发计算 embeddings 后向现有向量库添加文档
+    
+    与 create_vector_store 相同，embeddings 按批并发计算；FAISS 向量库
+    通过 add_embeddings 一次性写入索引，不会再次计算 embeddings。
+    
+    Args:
+        vector_store: 向量存储实例
+        documents: 要添加的文档列表
+        batch_size: 每批计算 embedding 的文档数量
+        max_concurrency: 最大并发 embedding 请求数
+        
+    Example:
+        >>> vector_store = load_vector_store("data/indexes/my_index", embeddings)
+        >>> await add_documents_to_vector_store_batched(vector_store, chunks)
+        >>> save_vector_store(vector_store, "data/indexes/my_index")
+    """
+    if not documents:
+        logger.warning("文档列表为空，无需添加")
+        return
+    
+    logger.info(f"➕ 向向量库批量添加文档: {len(documents)} 个")
+    
+    try:
+        if FAISS_AVAILABLE and isinstance(vector_store, FAISS) and vector_store.embeddings:
+            texts = [doc.page_content for doc in documents]
+            vectors = await aembed_in_batches(
+                vector_store.embeddings, texts, batch_size, max_concurrency
+            )
+            vector_store.add_embeddings(
+                text_embeddings=list(zip(texts, vectors)),
+                metadatas=[doc.metadata for doc in documents],
+            )
+        else:
+            await vector_store.aadd_documents(documents)
+        
+        logger.info("✅ 文档添加成功")
+        
+    except Exception as e:
+        logger.error(f"❌ 添加文档失败: {e}")
+        raise
+
+
+def _embedding_key(embeddings: Embeddings) -> Optional[tuple]:
+    """
+    嵌入模型的缓存标识
+    
+    get_embeddings() 每次调用都会创建新实例，因此按模型名（以及会影响
+    向量的截断长度）区分，而不是实例本身。取不到模型名时返回 None，表示不缓存。
+    """
+    model = getattr(embeddings, "model", None)
+    if not model:
+        return None
+    return (type(embeddings).__qualname__, model, getattr(embeddings, "max_tokens", None))
+
+
+def _embed_query_cached(embeddings: Embeddings, query: str) -> List[float]:
+    """计算查询向量，相同模型的相同查询直接复用缓存结果"""
+    embedding_key = _embedding_key(embeddings)
+    if embedding_key is None:
+        return embeddings.embed_query(query)
+    
+    key = (embedding_key, query)
+    vector = _query_embedding_cache.get(key)
+    if vector is not None:
+        _query_embedding_cache.move_to_end(key)
+        return vector
+    
+    vector = embeddings.embed_query(query)
+    _query_embedding_cache[key] = vector
+    if len(_query_embedding_cache) > _QUERY_EMBEDDING_CACHE_SIZE:
+        _query_embedding_cache.popitem(last=False)
+    return vector
+
+
+def _faiss_range_search(
+    vector_store: VectorStore,
+    vector: List[float],
+    k: int,
+    score_threshold: float,
+) -> Optional[List[tuple[Document, float]]]:
+    """
+    在 FAISS 索引内按阈值检索，只返回分数不低于阈值的前 k 个文档
+    
+    仅适用于内积度量：此时分数越大越相似，range_search 的半径可以直接
+    使用 score_threshold。L2 度量下分数是距离，与 search_vector_store 中
+    "score >= score_threshold" 的过滤方向相反；HNSW 等索引不支持 range_search。
+    这些情况返回 None，由调用方回退到普通检索加阈值过滤。
+    """
+    if not (FAISS_AVAILABLE and isinstance(vector_store, FAISS)):
+        return None
+    
+    index = vector_store.index
+    if index.metric_type != faiss.METRIC_INNER_PRODUCT:
+        return None
+    
+    matrix = np.asarray([vector], dtype="float32")
+    if vector_store._normalize_L2:
+        faiss.normalize_L2(matrix)
+    
+    try:
+        lims, distances, indices = index.range_search(matrix, score_threshold)
+    except RuntimeError:
+        return None
+    
+    order = np.argsort(-distances[lims[0]:lims[1]])[:k]
+    results = []
+    for pos in order:
+        i = int(indices[pos])
+        doc_id = vector_store.index_to_docstore_id[i]
+        results.append((vector_store.docstore.search(doc_id), float(distances[pos])))
+    return results
+
+
 def search_vector_store(
     vector_store: VectorStore,
     query: str,
@@ -297,11 +672,21 @@ def search_vector_store(
     logger.info(f"🔍 搜索向量库: query='{query[:50]}...', k={k}")
     
     try:
-        # 使用 similarity_search_with_score 获取相似度分数
-        results = vector_store.similarity_search_with_score(
-            query=query,
-            k=k,
-        )
+        embeddings = vector_store.embeddings
+        if embeddings is not None and hasattr(vector_store, "similarity_search_with_score_by_vector"):
+            # 复用缓存的查询向量，重复查询不再请求嵌入服务
+            vector = _embed_query_cached(embeddings, query)
+            results = None
+            if score_threshold is not None:
+                results = _faiss_range_search(vector_store, vector, k, score_threshold)
+            if results is None:
+                results = vector_store.similarity_search_with_score_by_vector(vector, k=k)
+        else:
+            # 使用 similarity_search_with_score 获取相似度分数
+            results = vector_store.similarity_search_with_score(
+                query=query,
+                k=k,
+            )
         
         # 如果设置了阈值，过滤结果
         if score_threshold is not None:
@@ -319,6 +704,86 @@ def search_vector_store(
         raise
 
 
+def search_vector_store_batch(
+    vector_store: VectorStore,
+    queries: List[str],
+    k: int = 4,
+    nprobe: Optional[int] = None,
+) -> List[List[tuple[Document, float]]]:
+    """
+    批量搜索多个查询
+    
+    FAISS 向量库会一次性计算所有查询的向量，并通过单次 index.search
+    完成检索；其他向量库逐个调用 search_vector_store。
+    
+    Args:
+        vector_store: 向量存储实例
+        queries: 查询文本列表
+        k: 每个查询返回的文档数量
+        nprobe: IVF 索引本次检索探查的聚类数，默认为 nlist // 32；
+            仅在本次检索期间生效，结束后恢复索引原有设置
+        
+    Returns:
+        与 queries 一一对应的 (Document, score) 列表
+        
+    Example:
+        >>> results = search_vector_store_batch(
+        ...     vector_store,
+        ...     ["什么是机器学习？", "什么是深度学习？"],
+        ...     k=3
+        ... )
+        >>> for query_results in results:
+        ...     print(len(query_results))
+    """
+    if not queries:
+        return []
+    
+    if not (FAISS_AVAILABLE and isinstance(vector_store, FAISS)):
+        return [search_vector_store(vector_store, query, k=k) for query in queries]
+    
+    logger.info(f"🔍 批量搜索向量库: {len(queries)} 个查询, k={k}")
+    
+    try:
+        embeddings = vector_store.embeddings
+        if embeddings is not None:
+            vectors = embeddings.embed_documents(queries)
+        else:
+            vectors = [vector_store.embedding_function(query) for query in queries]
+        
+        matrix = np.asarray(vectors, dtype="float32")
+        if vector_store._normalize_L2:
+            faiss.normalize_L2(matrix)
+        
+        index = vector_store.index
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            saved_nprobe = ivf.nprobe
+            ivf.nprobe = nprobe or max(1, ivf.nlist // 32)
+            try:
+                distances, indices = index.search(matrix, k)
+            finally:
+                ivf.nprobe = saved_nprobe
+        else:
+            distances, indices = index.search(matrix, k)
+        
+        results = []
+        for row_distances, row_indices in zip(distances, indices):
+            row = []
+            for distance, i in zip(row_distances, row_indices):
+                if i == -1:
+                    continue
+                doc_id = vector_store.index_to_docstore_id[i]
+                row.append((vector_store.docstore.search(doc_id), float(distance)))
+            results.append(row)
+        
+        logger.info("✅ 批量搜索完成")
+        return results
+        
+    except Exception as e:
+        logger.error(f"❌ 批量搜索失败: {e}")
+        raise
+
+
 def get_vector_store_stats(vector_store: VectorStore) -> dict:
     """
     获取向量库的统计信息
@@ -17,6 +17,7 @@ CLI 演示工具
 
 import sys
 import asyncio
+import threading
 from pathlib import Path
 from typing import Optional, List
 
@@ -24,8 +25,8 @@ from typing import Optional, List
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from agents import create_base_agent
-from core.tools import ALL_TOOLS, BASIC_TOOLS
+# Agent 和工具在首次创建 Agent 时才导入（会加载 LangChain、LLM 客户端等），
+# 仅导入本模块（如测试 ChatSession）时不会加载整个 Agent 栈
 from config import settings, setup_logging, get_logger
 
 # 初始化日志
@@ -46,9 +47,19 @@ class Colors:
     UNDERLINE = '\033[4m'
 
 
-def print_colored(text: str, color: str = Colors.ENDC):
-    """打印彩色文本"""
-    print(f"{color}{text}{Colors.ENDC}")
+if not sys.stdout.isatty():
+    # 输出被重定向到文件/管道时不写入颜色代码
+    for _name in [k for k in vars(Colors) if not k.startswith('_')]:
+        setattr(Colors, _name, '')
+
+
+def print_colored(text: str, color: str = Colors.ENDC, end: str = "\n"):
+    """打印彩色文本（支持 end 参数）"""
+    write = sys.stdout.write
+    write(color)
+    write(text)
+    write(Colors.ENDC)
+    write(end)
 
 
 def print_banner():
@@ -88,6 +99,9 @@ def print_help():
 class ChatSession:
     """聊天会话管理"""
     
+    # 已创建的 Agent，按 (mode, use_tools, use_advanced_tools) 复用
+    _agent_pool: dict = {}
+    
     def __init__(
         self,
         mode: str = "default",
@@ -106,6 +120,9 @@ class ChatSession:
     
     def _create_agent(self):
         """创建或重新创建 Agent"""
+        from agents import create_base_agent
+        from core.tools import ALL_TOOLS, BASIC_TOOLS
+        
         # 选择工具
         if not self.use_tools:
             tools = []
@@ -114,6 +131,14 @@ class ChatSession:
         else:
             tools = BASIC_TOOLS
         
+        # 复用相同配置的 Agent，切换回之前的配置时无需重新创建
+        key = (self.mode, self.use_tools, self.use_advanced_tools)
+        agent = self._agent_pool.get(key)
+        if agent is not None:
+            self.agent = agent
+            logger.info(f"复用 Agent: mode={self.mode}, tools={len(tools)}")
+            return
+        
         # 创建 Agent
         self.agent = create_base_agent(
             tools=tools,
@@ -121,6 +146,7 @@ class ChatSession:
             # streaming=self.streaming,
             # verbose=False,
         )
+        self._agent_pool[key] = self.agent
         
         logger.info(f"Agent 已创建: mode={self.mode}, streaming={self.streaming}, tools={len(tools)}")
     
@@ -168,12 +194,14 @@ class ChatSession:
             # 流式输出
             print_colored("🤖 助手: ", Colors.BLUE, end="")
             
+            write, flush = sys.stdout.write, sys.stdout.flush
             full_response = ""
             async for chunk in self.agent.astream(
                 input_text=message,
                 chat_history=self.chat_history,
             ):
-                print(chunk, end="", flush=True)
+                write(chunk)
+                flush()
                 full_response += chunk
             
             print()  # 换行
@@ -197,6 +225,28 @@ class ChatSession:
             return response
 
 
+async def ainput() -> str:
+    """
+    读取一行用户输入，等待期间不阻塞事件循环
+    
+    使用守护线程而不是 asyncio.to_thread：按 Ctrl+C 退出时，asyncio.run
+    会等待默认线程池中的线程结束，阻塞在 input() 上的线程会让程序挂起。
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def read():
+        try:
+            line = input()
+        except BaseException as e:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_exception(e))
+        else:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(line))
+    
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
+
 async def main():
     """主函数"""
     print_banner()
@@ -213,38 +263,48 @@ async def main():
     if not settings.tavily_api_key:
         print_colored("⚠️  未配置 Tavily API Key，网络搜索功能将不可用", Colors.YELLOW)
     
-    print_help()
-    
-    # 创建会话
-    session = ChatSession(
+    # 在后台创建会话（加载 Agent 栈、构建模型客户端），与用户输入第一条消息并行
+    session_task = asyncio.create_task(asyncio.to_thread(
+        ChatSession,
         mode="default",
         streaming=False,
         use_tools=True,
         use_advanced_tools=bool(settings.tavily_api_key),
-    )
+    ))
+    
+    print_help()
     
     # 主循环
     while True:
         try:
             # 获取用户输入
             print_colored("\n👤 你: ", Colors.GREEN, end="")
-            user_input = input().strip()
+            sys.stdout.flush()
+            user_input = (await ainput()).strip()
             
             if not user_input:
                 continue
             
+            # 退出和帮助命令不依赖会话，先于等待会话处理
+            command = user_input.lower()
+            if command == "/quit" or command == "/exit" or command == "/q":
+                print_colored("\n👋 再见！", Colors.CYAN)
+                break
+            
+            if command == "/help" or command == "/h":
+                print_help()
+                continue
+            
+            try:
+                session = await session_task
+            except Exception as e:
+                print_colored(f"\n❌ 会话初始化失败: {e}", Colors.RED)
+                logger.error(f"会话初始化失败: {e}", exc_info=True)
+                return
+            
             # 处理命令
             if user_input.startswith("/"):
-                command = user_input.lower()
-                
-                if command == "/quit" or command == "/exit" or command == "/q":
-                    print_colored("\n👋 再见！", Colors.CYAN)
-                    break
-                
-                elif command == "/help" or command == "/h":
-                    print_help()
-                
-                elif command.startswith("/mode"):
+                if command.startswith("/mode"):
                     parts = command.split()
                     if len(parts) > 1:
                         session.set_mode(parts[1])
@@ -288,11 +348,6 @@ async def main():
             logger.error(f"CLI 错误: {e}", exc_info=True)
 
 
-def print_colored(text: str, color: str = Colors.ENDC, end: str = "\n"):
-    """打印彩色文本（支持 end 参数）"""
-    print(f"{color}{text}{Colors.ENDC}", end=end)
-
-
 if __name__ == "__main__":
     try:
         asyncio.run(main())
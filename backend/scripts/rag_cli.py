@@ -27,7 +27,10 @@ RAG CLI 工具
     python scripts/rag_cli.py interactive my_docs
 """
 
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 
 # 确保项目根目录在 Python 路径中
@@ -40,18 +43,26 @@ from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.markdown import Markdown
+from rich.live import Live
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from config import setup_logging, get_logger
+from config import settings, setup_logging, get_logger
 from rag import (
     IndexManager,
-    load_directory,
+    SemanticCache,
+    load_document,
+    get_supported_extensions,
     split_documents,
     get_embeddings,
     create_retriever,
     create_rag_agent,
     query_rag_agent,
 )
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessageChunk, ToolMessage
+from rag._scoring import to_similarity, topk
+from rag.embedding_cache import EmbeddingCache
+from rag.retrievers import TOOL_SOURCE_RE
 from rag.vector_stores import search_vector_store
 
 # 初始化日志
@@ -61,13 +72,99 @@ logger = get_logger(__name__)
 # Rich Console
 console = Console()
 
+# 同一进程内复用 embedding 模型实例
+_get_embeddings = lru_cache(maxsize=1)(get_embeddings)
+
+# 语义缓存文件目录
+_SEM_CACHE_DIR = Path.home() / ".cache" / "lc-studylab" / "semcache"
+
+# embedding 缓存数据库路径
+_EMBED_CACHE_PATH = Path.home() / ".cache" / "lc-studylab" / "embeddings.sqlite3"
+
+
+def _index_mtime(manager, index_name):
+    """索引目录中文件的最新修改时间"""
+    index_path = manager.base_path / index_name
+    return max((f.stat().st_mtime for f in index_path.iterdir()), default=0.0)
+
+
+def _get_semantic_cache(manager, index_name, threshold, k):
+    """
+    获取索引和检索数量 k 对应的语义缓存
+    
+    不同 k 检索到的文档不同，回答分别缓存在各自的文件中。threshold 大于 1
+    表示不使用缓存，返回 None。缓存文件早于索引文件时说明索引已重建或更新，
+    丢弃旧的回答。
+    """
+    if threshold > 1:
+        return None
+    path = _SEM_CACHE_DIR / f"{index_name}.k{k}.pkl"
+    if path.exists() and path.stat().st_mtime < _index_mtime(manager, index_name):
+        path.unlink()
+    return SemanticCache(str(path), threshold=threshold)
+
+
+def _stream_answer(agent, question, render=Markdown):
+    """
+    流式生成回答，边生成边在终端刷新显示
+    
+    Args:
+        agent: RAG Agent（streaming=True）
+        question: 问题
+        render: 将当前回答文本转换为 Rich 可渲染对象的函数
+        
+    Returns:
+        (回答, 来源列表)
+    """
+    if not hasattr(agent, "stream"):
+        result = query_rag_agent(agent, question, return_sources=True)
+        console.print(render(result["answer"]))
+        return result["answer"], result.get("sources", [])
+    
+    parts = []
+    sources = {}
+    with Live(render(""), console=console, refresh_per_second=10) as live:
+        for message, _ in agent.stream(
+            {"messages": [{"role": "user", "content": question}]},
+            stream_mode="messages",
+        ):
+            if isinstance(message, AIMessageChunk) and isinstance(message.content, str) and message.content:
+                parts.append(message.content)
+                live.update(render("".join(parts)))
+            elif isinstance(message, ToolMessage):
+                sources.update(dict.fromkeys(TOOL_SOURCE_RE.findall(str(message.content))))
+    
+    return "".join(parts), list(sources)
+
+
+class _QueryCachedEmbeddings(Embeddings):
+    """为 embed_query 增加 LRU 缓存，重复的问题不再请求 embedding 服务"""
+    
+    def __init__(self, embeddings, maxsize=256):
+        self.embeddings = embeddings
+        self._embed_query = lru_cache(maxsize=maxsize)(self._embed_query_uncached)
+    
+    def _embed_query_uncached(self, text):
+        return tuple(self.embeddings.embed_query(text))
+    
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+    
+    def embed_query(self, text):
+        return list(self._embed_query(text))
+    
+    def cache_info(self):
+        return self._embed_query.cache_info()
+
 
 # ==================== 索引管理命令 ====================
 
 @click.group()
-def cli():
+@click.pass_context
+def cli(ctx):
     """RAG CLI - 命令行 RAG 工具"""
-    pass
+    # 所有子命令共享同一个索引管理器
+    ctx.obj = {"manager": IndexManager()}
 
 
 @cli.group()
@@ -76,6 +173,94 @@ def index():
     pass
 
 
+def _collect_files(directory_path):
+    """递归收集目录中所有支持的文件"""
+    files = []
+    for ext in get_supported_extensions():
+        files.extend(directory_path.glob(f"**/*{ext}"))
+    return files
+
+
+def _load_files(files, workers, progress, task):
+    """
+    加载文件列表，按文件更新进度
+    
+    workers > 1 时使用进程池并行解析；结果按 files 的顺序合并。
+    单个文件加载失败只记录日志，不影响其他文件。
+    """
+    results = [[] for _ in files]
+    
+    def on_done(i, load):
+        try:
+            results[i] = load()
+        except Exception as e:
+            logger.error(f"加载失败: {files[i].name}, 错误: {e}")
+        progress.advance(task)
+    
+    if workers is None or workers <= 1 or len(files) <= 1:
+        for i, file_path in enumerate(files):
+            on_done(i, lambda: load_document(str(file_path), add_metadata=True))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+            futures = {
+                executor.submit(load_document, str(file_path), True): i
+                for i, file_path in enumerate(files)
+            }
+            for future in as_completed(futures):
+                on_done(futures[future], future.result)
+    
+    return [doc for docs in results for doc in docs]
+
+
+def _embed_chunks(embeddings, chunks, batch_size, progress, task, cache=None):
+    """
+    分批计算文本块的 embeddings，并按批更新进度
+    
+    提供 cache 时先按文本内容查找缓存，只为未命中的文本块请求 embedding
+    服务，新结果按批写回缓存。某一批请求失败时，逐个重试该批中的文本块。
+    """
+    texts = [chunk.page_content for chunk in chunks]
+    vectors = [None] * len(texts)
+    
+    if cache is not None:
+        keys = [cache.key(text) for text in texts]
+        hits = cache.get_many(keys)
+        for i, key in enumerate(keys):
+            vectors[i] = hits.get(key)
+        logger.info(f"embedding 缓存命中 {len(hits)}/{len(texts)} 个文本块")
+    
+    misses = [i for i, vector in enumerate(vectors) if vector is None]
+    done = len(texts) - len(misses)
+    progress.update(
+        task,
+        completed=done,
+        description=f"🔢 创建 embeddings... {done}/{len(texts)} chunks",
+    )
+    
+    for start in range(0, len(misses), batch_size):
+        batch = misses[start:start + batch_size]
+        batch_texts = [texts[i] for i in batch]
+        try:
+            batch_vectors = embeddings.embed_documents(batch_texts)
+        except Exception as e:
+            logger.warning(f"批量计算 embeddings 失败，逐个重试: {e}")
+            batch_vectors = [embeddings.embed_documents([text])[0] for text in batch_texts]
+        
+        for i, vector in zip(batch, batch_vectors):
+            vectors[i] = vector
+        if cache is not None:
+            cache.put_many((keys[i], vector) for i, vector in zip(batch, batch_vectors))
+        
+        done += len(batch)
+        progress.update(
+            task,
+            advance=len(batch),
+            description=f"🔢 创建 embeddings... {done}/{len(texts)} chunks",
+        )
+    
+    return vectors
+
+
 @index.command("create")
 @click.argument("name")
 @click.argument("directory")
@@ -83,7 +268,11 @@ def index():
 @click.option("--chunk-size", type=int, default=None, help="分块大小")
 @click.option("--chunk-overlap", type=int, default=None, help="分块重叠")
 @click.option("--overwrite", is_flag=True, help="覆盖已存在的索引")
-def create_index(name, directory, description, chunk_size, chunk_overlap, overwrite):
+@click.option("--embed-batch-size", type=int, default=64, show_default=True, help="每次请求计算 embedding 的文本块数量")
+@click.option("--workers", type=int, default=os.cpu_count(), show_default=True, help="并行解析和分块文档的进程数（1 表示在当前进程中串行处理）")
+@click.option("--no-embed-cache", is_flag=True, help="不使用 embedding 缓存，重新计算所有文本块")
+@click.pass_obj
+def create_index(obj, name, directory, description, chunk_size, chunk_overlap, overwrite, embed_batch_size, workers, no_embed_cache):
     """
     创建新索引
     
@@ -100,7 +289,7 @@ def create_index(name, directory, description, chunk_size, chunk_overlap, overwr
             sys.exit(1)
         
         # 创建索引管理器
-        manager = IndexManager()
+        manager = obj["manager"]
         
         # 检查索引是否已存在
         if manager.index_exists(name) and not overwrite:
@@ -114,8 +303,9 @@ def create_index(name, directory, description, chunk_size, chunk_overlap, overwr
             console=console,
         ) as progress:
             # 加载文档
-            task = progress.add_task("📂 加载文档...", total=None)
-            documents = load_directory(str(directory_path), show_progress=False)
+            files = _collect_files(directory_path)
+            task = progress.add_task("📂 加载文档...", total=len(files))
+            documents = _load_files(files, workers, progress, task)
             progress.update(task, description=f"✅ 加载了 {len(documents)} 个文档")
             
             if not documents:
@@ -128,19 +318,28 @@ def create_index(name, directory, description, chunk_size, chunk_overlap, overwr
                 documents,
                 chunk_size=chunk_size,
                 chunk_overlap=chunk_overlap,
+                max_workers=workers or 1,
             )
             progress.update(task, description=f"✅ 生成了 {len(chunks)} 个文本块")
             
             # 创建 embeddings
-            task = progress.add_task("🔢 创建 embeddings...", total=None)
-            embeddings = get_embeddings()
-            progress.update(task, description="✅ Embeddings 准备完成")
+            task = progress.add_task("🔢 创建 embeddings...", total=len(chunks))
+            embeddings = _get_embeddings()
+            cache = None if no_embed_cache else EmbeddingCache(str(_EMBED_CACHE_PATH), settings.embedding_model)
+            try:
+                vectors = _embed_chunks(embeddings, chunks, embed_batch_size, progress, task, cache)
+            finally:
+                if cache is not None:
+                    cache.close()
+            progress.update(task, description=f"✅ 计算了 {len(vectors)} 个 embeddings")
             
-            # 创建索引
+            # 创建索引（其他进程可能已修改索引目录，先刷新元数据缓存）
             task = progress.add_task("🗄️  创建向量索引...", total=None)
-            manager.create_index(
+            manager.reload()
+            manager.create_index_from_embeddings(
                 name=name,
                 documents=chunks,
+                vectors=vectors,
                 embeddings=embeddings,
                 description=description,
                 overwrite=overwrite,
@@ -169,10 +368,11 @@ def create_index(name, directory, description, chunk_size, chunk_overlap, overwr
 
 
 @index.command("list")
-def list_indexes():
+@click.pass_obj
+def list_indexes(obj):
     """列出所有索引"""
     try:
-        manager = IndexManager()
+        manager = obj["manager"]
         indexes = manager.list_indexes()
         
         if not indexes:
@@ -204,14 +404,15 @@ def list_indexes():
 
 @index.command("info")
 @click.argument("name")
-def show_index_info(name):
+@click.pass_obj
+def show_index_info(obj, name):
     """
     显示索引详细信息
     
     NAME: 索引名称
     """
     try:
-        manager = IndexManager()
+        manager = obj["manager"]
         
         if not manager.index_exists(name):
             console.print(f"\n[red]❌ 索引不存在: {name}[/red]\n")
@@ -247,14 +448,15 @@ def show_index_info(name):
 @index.command("delete")
 @click.argument("name")
 @click.confirmation_option(prompt="确定要删除这个索引吗？")
-def delete_index(name):
+@click.pass_obj
+def delete_index(obj, name):
     """
     删除索引
     
     NAME: 索引名称
     """
     try:
-        manager = IndexManager()
+        manager = obj["manager"]
         
         if not manager.index_exists(name):
             console.print(f"\n[red]❌ 索引不存在: {name}[/red]\n")
@@ -275,7 +477,10 @@ def delete_index(name):
 @click.argument("query")
 @click.option("--k", type=int, default=4, help="返回文档数量")
 @click.option("--show-sources", is_flag=True, help="显示来源文档")
-def query(index_name, query, k, show_sources):
+@click.option("--sem-cache-threshold", type=float, default=0.95, show_default=True, help="语义缓存命中所需的最小相似度（大于 1 表示不使用缓存）")
+@click.option("--mmap/--no-mmap", default=False, help="以只读内存映射方式加载 FAISS 索引（大索引启动更快、常驻内存更少）")
+@click.pass_obj
+def query(obj, index_name, query, k, show_sources, sem_cache_threshold, mmap):
     """
     RAG 查询
     
@@ -286,7 +491,7 @@ def query(index_name, query, k, show_sources):
         console.print(f"\n[bold blue]🔍 查询: {query}[/bold blue]\n")
         
         # 检查索引
-        manager = IndexManager()
+        manager = obj["manager"]
         if not manager.index_exists(index_name):
             console.print(f"[red]❌ 索引不存在: {index_name}[/red]")
             sys.exit(1)
@@ -298,28 +503,43 @@ def query(index_name, query, k, show_sources):
         ) as progress:
             # 加载索引
             task = progress.add_task("📂 加载索引...", total=None)
-            embeddings = get_embeddings()
-            vector_store = manager.load_index(index_name, embeddings)
+            embeddings = _QueryCachedEmbeddings(_get_embeddings())
+            vector_store = manager.load_index(index_name, embeddings, mmap=mmap)
             progress.update(task, description="✅ 索引加载完成")
             
-            # 创建检索器和 Agent
-            task = progress.add_task("🤖 创建 RAG Agent...", total=None)
-            retriever = create_retriever(vector_store, k=k)
-            agent = create_rag_agent(retriever, streaming=False)
-            progress.update(task, description="✅ Agent 准备完成")
+            # 查找语义缓存
+            sem_cache = _get_semantic_cache(manager, index_name, sem_cache_threshold, k)
+            hit = None
+            if sem_cache is not None:
+                query_vector = embeddings.embed_query(query)
+                hit = sem_cache.lookup(query_vector)
             
-            # 查询
-            task = progress.add_task("💭 生成回答...", total=None)
-            result = query_rag_agent(agent, query, return_sources=True)
-            progress.update(task, description="✅ 回答生成完成")
+            if hit is None:
+                # 创建检索器和 Agent
+                task = progress.add_task("🤖 创建 RAG Agent...", total=None)
+                retriever = create_retriever(vector_store, k=k)
+                agent = create_rag_agent(retriever, streaming=True)
+                progress.update(task, description="✅ Agent 准备完成")
+        
+        def render(answer):
+            return Panel(
+                Markdown(answer),
+                title="[bold green]回答[/bold green]",
+                border_style="green",
+            )
         
         # 显示回答
         console.print("\n")
-        console.print(Panel(
-            Markdown(result["answer"]),
-            title="[bold green]回答[/bold green]",
-            border_style="green",
-        ))
+        if hit is None:
+            answer, sources = _stream_answer(agent, query, render)
+            result = {"answer": answer, "sources": sources}
+            if sem_cache is not None:
+                sem_cache.add(query_vector, answer, sources)
+                sem_cache.save()
+        else:
+            result, similarity = hit
+            console.print(f"[dim](cache hit sim={similarity:.3f})[/dim]")
+            console.print(render(result["answer"]))
         
         # 显示来源
         if show_sources and result.get("sources"):
@@ -339,7 +559,9 @@ def query(index_name, query, k, show_sources):
 @click.argument("index_name")
 @click.argument("query")
 @click.option("--k", type=int, default=4, help="返回文档数量")
-def search(index_name, query, k):
+@click.option("--mmap/--no-mmap", default=False, help="以只读内存映射方式加载 FAISS 索引（大索引启动更快、常驻内存更少）")
+@click.pass_obj
+def search(obj, index_name, query, k, mmap):
     """
     纯检索（不生成回答）
     
@@ -350,7 +572,7 @@ def search(index_name, query, k):
         console.print(f"\n[bold blue]🔍 检索: {query}[/bold blue]\n")
         
         # 检查索引
-        manager = IndexManager()
+        manager = obj["manager"]
         if not manager.index_exists(index_name):
             console.print(f"[red]❌ 索引不存在: {index_name}[/red]")
             sys.exit(1)
@@ -362,8 +584,8 @@ def search(index_name, query, k):
         ) as progress:
             # 加载索引
             task = progress.add_task("📂 加载索引...", total=None)
-            embeddings = get_embeddings()
-            vector_store = manager.load_index(index_name, embeddings)
+            embeddings = _get_embeddings()
+            vector_store = manager.load_index(index_name, embeddings, mmap=mmap)
             progress.update(task, description="✅ 索引加载完成")
             
             # 检索
@@ -371,10 +593,18 @@ def search(index_name, query, k):
             results = search_vector_store(vector_store, query, k=k)
             progress.update(task, description=f"✅ 找到 {len(results)} 个文档")
         
+        # 统一换算为相似度（FAISS 默认返回 L2 距离）并按相似度排序
+        similarities = to_similarity(
+            [score for _, score in results],
+            getattr(vector_store, "distance_strategy", None),
+        )
+        order = topk(similarities, k)
+        
         # 显示结果
         console.print(f"\n[bold green]找到 {len(results)} 个相关文档:[/bold green]\n")
         
-        for i, (doc, score) in enumerate(results, 1):
+        for i, pos in enumerate(order, 1):
+            doc, score = results[pos][0], similarities[pos]
             console.print(Panel(
                 f"[cyan]相似度:[/cyan] {score:.4f}\n\n{doc.page_content[:300]}...",
                 title=f"[bold]文档 {i}[/bold]",
@@ -391,7 +621,10 @@ def search(index_name, query, k):
 
 @cli.command()
 @click.argument("index_name")
-def interactive(index_name):
+@click.option("--sem-cache-threshold", type=float, default=0.95, show_default=True, help="语义缓存命中所需的最小相似度（大于 1 表示不使用缓存）")
+@click.option("--mmap/--no-mmap", default=False, help="以只读内存映射方式加载 FAISS 索引（大索引启动更快、常驻内存更少）")
+@click.pass_obj
+def interactive(obj, index_name, sem_cache_threshold, mmap):
     """
     交互式查询模式
     
@@ -399,7 +632,7 @@ def interactive(index_name):
     """
     try:
         # 检查索引
-        manager = IndexManager()
+        manager = obj["manager"]
         if not manager.index_exists(index_name):
             console.print(f"\n[red]❌ 索引不存在: {index_name}[/red]\n")
             sys.exit(1)
@@ -410,10 +643,12 @@ def interactive(index_name):
         
         # 加载索引
         with console.status("[bold green]加载索引..."):
-            embeddings = get_embeddings()
-            vector_store = manager.load_index(index_name, embeddings)
-            retriever = create_retriever(vector_store)
-            agent = create_rag_agent(retriever, streaming=False)
+            embeddings = _QueryCachedEmbeddings(_get_embeddings())
+            vector_store = manager.load_index(index_name, embeddings, mmap=mmap)
+            k = settings.retriever_k
+            retriever = create_retriever(vector_store, k=k)
+            agent = create_rag_agent(retriever, streaming=True)
+            sem_cache = _get_semantic_cache(manager, index_name, sem_cache_threshold, k)
         
         console.print("[green]✅ 准备完成，开始提问吧！[/green]\n")
         
@@ -431,13 +666,22 @@ def interactive(index_name):
                     console.print("\n[yellow]👋 再见！[/yellow]\n")
                     break
                 
-                # 查询
-                with console.status("[bold green]思考中..."):
-                    result = query_rag_agent(agent, user_input, return_sources=True)
-                
-                # 显示回答
+                # 查询（优先使用语义缓存），回答边生成边显示
+                hit = None
+                if sem_cache is not None:
+                    query_vector = embeddings.embed_query(user_input)
+                    hit = sem_cache.lookup(query_vector)
                 console.print("\n[bold green]助手:[/bold green]")
-                console.print(Markdown(result["answer"]))
+                if hit is None:
+                    answer, sources = _stream_answer(agent, user_input)
+                    result = {"answer": answer, "sources": sources}
+                    if sem_cache is not None:
+                        sem_cache.add(query_vector, answer, sources)
+                        sem_cache.save()
+                else:
+                    result, similarity = hit
+                    console.print(f"[dim](cache hit sim={similarity:.3f})[/dim]")
+                    console.print(Markdown(result["answer"]))
                 
                 # 显示来源
                 if result.get("sources"):
@@ -452,6 +696,9 @@ def interactive(index_name):
                 console.print(f"\n[red]❌ 错误: {e}[/red]\n")
                 continue
         
+        info = embeddings.cache_info()
+        logger.info(f"查询 embedding 缓存: 命中 {info.hits} 次, 未命中 {info.misses} 次")
+        
     except Exception as e:
         console.print(f"\n[red]❌ 启动交互模式失败: {e}[/red]\n")
         sys.exit(1)
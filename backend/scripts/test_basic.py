@@ -11,6 +11,7 @@
 """
 
 import sys
+import asyncio
 from pathlib import Path
 
 # 添加项目根目录到 Python 路径
@@ -88,28 +89,33 @@ def test_tools():
         return False
 
 
-def test_agent():
+async def test_agent():
     """测试 Agent 基本功能"""
     print("\n" + "=" * 60)
     print("测试 4: Agent 基本功能")
     print("=" * 60)
     
     try:
-        # 创建 Agent
-        agent = create_base_agent(
+        # 创建 Agent（两个请求并发执行，各用一个 Agent 实例）
+        chat_agent = create_base_agent(
             # streaming=False
         )
+        tool_agent = create_base_agent()
         print("✅ Agent 创建成功")
         
+        # 并发执行简单对话和工具调用
+        chat_response, tool_response = await asyncio.gather(
+            chat_agent.ainvoke("你好，请用一句话介绍自己"),
+            tool_agent.ainvoke("现在几点？"),
+        )
+        
         # 测试简单对话
         print("\n测试对话: '你好'")
-        response = agent.invoke("你好，请用一句话介绍自己")
-        print(f"✅ Agent 响应: {response[:100]}...")
+        print(f"✅ Agent 响应: {chat_response[:100]}...")
         
         # 测试工具调用
         print("\n测试工具调用: '现在几点？'")
-        response = agent.invoke("现在几点？")
-        print(f"✅ Agent 响应: {response}")
+        print(f"✅ Agent 响应: {tool_response}")
         
         return True
     except Exception as e:
@@ -130,7 +136,7 @@ def main():
     results.append(("配置加载", test_config()))
     results.append(("模型创建", test_model()))
     results.append(("工具调用", test_tools()))
-    results.append(("Agent 功能", test_agent()))
+    results.append(("Agent 功能", asyncio.run(test_agent())))
     
     # 输出测试总结
     print("\n" + "=" * 60)
@@ -114,8 +114,45 @@ def test_filesystem():
         return False
 
 
-def test_basic_research():
-    """测试基础研究（仅网络搜索）"""
+# 基础研究测试的问题列表，可按需扩展，所有问题并发研究
+BASIC_RESEARCH_QUERIES = [
+    "LangChain 1.0 有哪些主要新特性？",
+]
+
+
+def show_basic_result(query: str, result: dict, fs, elapsed_time: float):
+    """显示单个基础研究任务的结果"""
+    console.print(f"\n[green]✅ 研究完成: {query}（耗时: {elapsed_time:.1f} 秒）[/green]\n")
+    
+    # 显示研究计划
+    if result.get("plan"):
+        console.print("[bold]研究计划:[/bold]")
+        plan = result["plan"]
+        console.print(f"  目标: {plan.get('research_goal', 'N/A')}")
+        console.print(f"  关键词: {', '.join(plan.get('search_keywords', []))}")
+    
+    # 显示完成的步骤
+    console.print("\n[bold]完成的步骤:[/bold]")
+    steps = result.get("steps_completed", {})
+    for step, completed in steps.items():
+        status = "✅" if completed else "❌"
+        console.print(f"  {status} {step}")
+    
+    # 显示最终报告（前500字符）
+    if result.get("final_report"):
+        console.print("\n[bold]最终报告（预览）:[/bold]")
+        report_preview = result["final_report"][:500]
+        console.print(Panel(report_preview + "...", expand=False))
+    
+    # 显示文件系统
+    console.print("\n[bold]生成的文件:[/bold]")
+    files = fs.list_files()
+    for f in files:
+        console.print(f"  📄 {f}")
+
+
+async def test_research_batch(queries: list[str]):
+    """测试基础研究（仅网络搜索），多个问题并发执行"""
     print_header("测试 2: 基础研究（网络搜索）")
     
     # 检查 API Key
@@ -124,24 +161,30 @@ def test_basic_research():
         return False
     
     try:
-        # 创建 DeepAgent
-        thread_id = "test_basic_001"
-        console.print(f"\n[yellow]创建 DeepAgent (thread_id: {thread_id})...[/yellow]")
-        
-        agent = create_deep_research_agent(
-            thread_id=thread_id,
-            enable_web_search=True,
-            enable_doc_analysis=False,
-        )
-        
-        print_success("DeepAgent 创建成功")
-        
-        # 执行研究
-        query = "LangChain 1.0 有哪些主要新特性？"
-        console.print(f"\n[yellow]研究问题: {query}[/yellow]")
+        # 每个问题一个 DeepAgent，各自使用独立的 thread_id
+        agents = []
+        for i, query in enumerate(queries, 1):
+            thread_id = f"test_basic_{i:03d}"
+            console.print(f"\n[yellow]创建 DeepAgent (thread_id: {thread_id})...[/yellow]")
+            
+            agent = create_deep_research_agent(
+                thread_id=thread_id,
+                enable_web_search=True,
+                enable_doc_analysis=False,
+            )
+            agents.append((agent, get_filesystem(thread_id)))
+        
+        print_success(f"DeepAgent 创建成功（{len(agents)} 个）")
+        
+        # 并发执行研究
+        for query in queries:
+            console.print(f"\n[yellow]研究问题: {query}[/yellow]")
         console.print("\n[dim]正在执行研究任务，这可能需要几分钟...[/dim]\n")
         
-        start_time = time.time()
+        async def run(agent, query):
+            start_time = time.time()
+            result = await asyncio.to_thread(agent.research, query)
+            return result, time.time() - start_time
         
         with Progress(
             SpinnerColumn(),
@@ -150,41 +193,15 @@ def test_basic_research():
         ) as progress:
             task = progress.add_task("研究中...", total=None)
             
-            result = agent.research(query)
+            outcomes = await asyncio.gather(*[
+                run(agent, query) for (agent, _), query in zip(agents, queries)
+            ])
             
             progress.update(task, completed=True)
         
-        elapsed_time = time.time() - start_time
-        
         # 显示结果
-        console.print(f"\n[green]✅ 研究完成！耗时: {elapsed_time:.1f} 秒[/green]\n")
-        
-        # 显示研究计划
-        if result.get("plan"):
-            console.print("[bold]研究计划:[/bold]")
-            plan = result["plan"]
-            console.print(f"  目标: {plan.get('research_goal', 'N/A')}")
-            console.print(f"  关键词: {', '.join(plan.get('search_keywords', []))}")
-        
-        # 显示完成的步骤
-        console.print("\n[bold]完成的步骤:[/bold]")
-        steps = result.get("steps_completed", {})
-        for step, completed in steps.items():
-            status = "✅" if completed else "❌"
-            console.print(f"  {status} {step}")
-        
-        # 显示最终报告（前500字符）
-        if result.get("final_report"):
-            console.print("\n[bold]最终报告（预览）:[/bold]")
-            report_preview = result["final_report"][:500]
-            console.print(Panel(report_preview + "...", expand=False))
-        
-        # 显示文件系统
-        console.print("\n[bold]生成的文件:[/bold]")
-        fs = get_filesystem(thread_id)
-        files = fs.list_files()
-        for f in files:
-            console.print(f"  📄 {f}")
+        for query, (_, fs), (result, elapsed_time) in zip(queries, agents, outcomes):
+            show_basic_result(query, result, fs, elapsed_time)
         
         print_success("基础研究测试通过！")
         return True
@@ -228,6 +245,7 @@ def test_full_research():
             enable_doc_analysis=True,
             retriever_tool=retriever_tool,
         )
+        fs = get_filesystem(thread_id)
         
         print_success("DeepAgent 创建成功（含文档分析）")
         
@@ -269,7 +287,6 @@ def test_full_research():
         
         # 显示文件系统
         console.print("\n[bold]生成的文件:[/bold]")
-        fs = get_filesystem(thread_id)
         files = fs.list_files()
         for f in files:
             console.print(f"  📄 {f}")
@@ -337,7 +354,7 @@ def main():
     
     # 测试 2: 基础研究
     if settings.tavily_api_key:
-        results["basic_research"] = test_basic_research()
+        results["basic_research"] = asyncio.run(test_research_batch(BASIC_RESEARCH_QUERIES))
     else:
         print_info("跳过基础研究测试（需要 Tavily API Key）")
         results["basic_research"] = None
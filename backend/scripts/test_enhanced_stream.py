@@ -8,7 +8,21 @@ import asyncio
 import json
 import sys
 import httpx
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, AsyncIterator
+
+try:
+    import orjson
+    # orjson 直接解析 bytes，比标准库 json 快数倍
+    json_loads = orjson.loads
+    
+    def json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    json_loads = json.loads
+    
+    def json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
 
 # 添加父目录到路径
 sys.path.insert(0, '/Users/longyang/development/python-workspace/lc-studylab/backend')
@@ -27,7 +41,79 @@ class Colors:
     UNDERLINE = '\033[4m'
 
 
-async def test_basic_chat():
+if not sys.stdout.isatty():
+    # 输出被重定向到文件/管道时不写入颜色代码
+    for _name in [k for k in vars(Colors) if not k.startswith('_')]:
+        setattr(Colors, _name, '')
+
+
+# 事件循环中使用的固定提示，预先拼接好颜色代码
+MSG_START_OK = f"{Colors.OKGREEN}✓ 收到开始事件{Colors.ENDC}\n"
+MSG_CONTEXT_OK = f"\n{Colors.OKCYAN}✓ 收到 Context 数据:{Colors.ENDC}\n"
+MSG_END_OK = f"\n{Colors.OKGREEN}✓ 收到结束事件{Colors.ENDC}\n"
+MSG_GEN_START = f"{Colors.OKGREEN}✓ 开始生成{Colors.ENDC}\n"
+TOOL_HDR = f"\n{Colors.OKBLUE}🔧 工具调用:{Colors.ENDC}\n"
+TOOL_RESULT_HDR = f"\n{Colors.OKBLUE}✓ 工具结果:{Colors.ENDC}\n"
+REASONING_HDR = f"\n{Colors.OKCYAN}💭 推理过程:{Colors.ENDC}\n"
+CONTEXT_HDR = f"\n{Colors.OKCYAN}📊 Context:{Colors.ENDC}\n"
+MSG_GEN_END = f"\n{Colors.OKGREEN}✓ 生成完成{Colors.ENDC}\n"
+TOOL_ITEM_PREFIX = f"\n{Colors.OKBLUE}🔧 "
+TOOL_DONE_PREFIX = f"{Colors.OKBLUE}✓ "
+
+
+# 累积多少个文本块后写一次终端
+FLUSH_EVERY = 16
+
+
+@dataclass(slots=True)
+class SseState:
+    """单个测试的流式事件统计和缓冲"""
+    starts: int = 0
+    chunks: int = 0
+    contexts: int = 0
+    ends: int = 0
+    content_parts: list = field(default_factory=list)
+    tool_calls: list = field(default_factory=list)
+    tool_results: list = field(default_factory=list)
+    has_context: bool = False
+    pending: list = field(default_factory=list)
+
+
+def flush_pending(pending: list) -> None:
+    """一次写出累积的文本块"""
+    if pending:
+        sys.stdout.write("".join(pending))
+        pending.clear()
+        sys.stdout.flush()
+
+
+async def iter_sse_events(response: httpx.Response) -> AsyncIterator[bytes]:
+    """
+    按 SSE 事件读取响应，返回每个事件的 data 内容
+    
+    以 64KB 为单位读取字节流，只在缓冲区中查找事件分隔符 b"\n\n"，
+    不做逐行解码；一个事件包含多行 data 时按 SSE 规范用换行拼接。
+    """
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes(chunk_size=65536):
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n\n", start)) != -1:
+            data = [
+                line[6:] for line in bytes(buffer[start:end]).splitlines()
+                if line.startswith(b"data: ")
+            ]
+            if data:
+                yield b"\n".join(data)
+            start = end + 2
+        del buffer[:start]
+
+
+def _noop(data, state):
+    """未知事件类型：忽略"""
+
+
+async def test_basic_chat(client: httpx.AsyncClient):
     """测试基础对话（无工具）"""
     print(f"\n{Colors.HEADER}=== 测试1: 基础对话 ==={Colors.ENDC}")
     
@@ -37,63 +123,76 @@ async def test_basic_chat():
         "use_tools": False,
     }
     
-    chunks_received = {
-        'start': 0,
-        'chunk': 0,
-        'context': 0,
-        'end': 0,
+    state = SseState()
+    
+    def _on_start(data, state):
+        state.starts += 1
+        sys.stdout.write(MSG_START_OK)
+    
+    def _on_chunk(data, state):
+        state.chunks += 1
+        content = data.get('content', '')
+        state.content_parts.append(content)
+        pending = state.pending
+        pending.append(content)
+        if len(pending) >= FLUSH_EVERY:
+            flush_pending(pending)
+    
+    def _on_context(data, state):
+        state.contexts += 1
+        sys.stdout.write(MSG_CONTEXT_OK)
+        context_data = data.get('data', {})
+        print(f"  - 使用 Token: {context_data.get('usedTokens')}/{context_data.get('maxTokens')}")
+        print(f"  - 模型: {context_data.get('modelId')}")
+        print(f"  - 使用率: {context_data.get('percentage', 0)*100:.2f}%")
+    
+    def _on_end(data, state):
+        state.ends += 1
+        sys.stdout.write(MSG_END_OK)
+    
+    handlers = {
+        'start': _on_start,
+        'chunk': _on_chunk,
+        'context': _on_context,
+        'end': _on_end,
     }
     
-    content_buffer = ""
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            async with client.stream(
-                "POST",
-                "http://localhost:8000/chat/stream",
-                json=request,
-                timeout=60.0
-            ) as response:
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = json.loads(line[6:])
-                        chunk_type = data.get('type')
-                        
-                        if chunk_type in chunks_received:
-                            chunks_received[chunk_type] += 1
-                        
-                        if chunk_type == 'start':
-                            print(f"{Colors.OKGREEN}✓ 收到开始事件{Colors.ENDC}")
-                        
-                        elif chunk_type == 'chunk':
-                            content = data.get('content', '')
-                            content_buffer += content
-                            print(content, end='', flush=True)
-                        
-                        elif chunk_type == 'context':
-                            print(f"\n{Colors.OKCYAN}✓ 收到 Context 数据:{Colors.ENDC}")
-                            context_data = data.get('data', {})
-                            print(f"  - 使用 Token: {context_data.get('usedTokens')}/{context_data.get('maxTokens')}")
-                            print(f"  - 模型: {context_data.get('modelId')}")
-                            print(f"  - 使用率: {context_data.get('percentage', 0)*100:.2f}%")
-                        
-                        elif chunk_type == 'end':
-                            print(f"\n{Colors.OKGREEN}✓ 收到结束事件{Colors.ENDC}")
-        
-        except Exception as e:
-            print(f"\n{Colors.FAIL}✗ 错误: {e}{Colors.ENDC}")
-            return False
+    try:
+        async with client.stream(
+            "POST",
+            "http://localhost:8000/chat/stream",
+            json=request,
+            timeout=60.0
+        ) as response:
+            async for event in iter_sse_events(response):
+                data = json_loads(event)
+                chunk_type = data.get('type')
+                if chunk_type != 'chunk':
+                    flush_pending(state.pending)
+                
+                handlers.get(chunk_type, _noop)(data, state)
+    
+    except Exception as e:
+        flush_pending(state.pending)
+        print(f"\n{Colors.FAIL}✗ 错误: {e}{Colors.ENDC}")
+        return False
+    
+    flush_pending(state.pending)
+    
+    content_buffer = "".join(state.content_parts)
     
     # 验证
     print(f"\n{Colors.BOLD}统计:{Colors.ENDC}")
-    for chunk_type, count in chunks_received.items():
-        print(f"  - {chunk_type}: {count}")
+    print(f"  - start: {state.starts}")
+    print(f"  - chunk: {state.chunks}")
+    print(f"  - context: {state.contexts}")
+    print(f"  - end: {state.ends}")
     
     success = (
-        chunks_received['start'] > 0 and
-        chunks_received['chunk'] > 0 and
-        chunks_received['context'] > 0 and
-        chunks_received['end'] > 0 and
+        state.starts > 0 and
+        state.chunks > 0 and
+        state.contexts > 0 and
+        state.ends > 0 and
         len(content_buffer) > 0
     )
     
@@ -105,7 +204,7 @@ async def test_basic_chat():
     return success
 
 
-async def test_tool_calling():
+async def test_tool_calling(client: httpx.AsyncClient):
     """测试工具调用"""
     print(f"\n{Colors.HEADER}=== 测试2: 工具调用 ==={Colors.ENDC}")
     
@@ -115,69 +214,89 @@ async def test_tool_calling():
         "use_tools": True,
     }
     
-    tool_calls = []
-    tool_results = []
-    content_buffer = ""
-    has_context = False
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            async with client.stream(
-                "POST",
-                "http://localhost:8000/chat/stream",
-                json=request,
-                timeout=60.0
-            ) as response:
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = json.loads(line[6:])
-                        chunk_type = data.get('type')
-                        
-                        if chunk_type == 'start':
-                            print(f"{Colors.OKGREEN}✓ 开始生成{Colors.ENDC}")
-                        
-                        elif chunk_type == 'chunk':
-                            content = data.get('content', '')
-                            content_buffer += content
-                            print(content, end='', flush=True)
-                        
-                        elif chunk_type == 'tool':
-                            tool_data = data.get('data', {})
-                            tool_calls.append(tool_data)
-                            print(f"\n{Colors.OKBLUE}🔧 工具调用:{Colors.ENDC}")
-                            print(f"  - 名称: {tool_data.get('name')}")
-                            print(f"  - 状态: {tool_data.get('state')}")
-                            print(f"  - 参数: {json.dumps(tool_data.get('parameters', {}), ensure_ascii=False)}")
-                        
-                        elif chunk_type == 'tool_result':
-                            result_data = data.get('data', {})
-                            tool_results.append(result_data)
-                            print(f"\n{Colors.OKBLUE}✓ 工具结果:{Colors.ENDC}")
-                            print(f"  - 状态: {result_data.get('state')}")
-                            result = result_data.get('result', '')
-                            if isinstance(result, str):
-                                print(f"  - 结果: {result[:100]}...")
-                            else:
-                                print(f"  - 结果: {result}")
-                        
-                        elif chunk_type == 'reasoning':
-                            print(f"\n{Colors.OKCYAN}💭 推理过程:{Colors.ENDC}")
-                            reasoning_data = data.get('data', {})
-                            print(f"  - 内容: {reasoning_data.get('content', '')[:100]}...")
-                            print(f"  - 耗时: {reasoning_data.get('duration', 0)}秒")
-                        
-                        elif chunk_type == 'context':
-                            has_context = True
-                            context_data = data.get('data', {})
-                            print(f"\n{Colors.OKCYAN}📊 Context:{Colors.ENDC}")
-                            print(f"  - Token使用: {context_data.get('usedTokens')}/{context_data.get('maxTokens')}")
-                        
-                        elif chunk_type == 'end':
-                            print(f"\n{Colors.OKGREEN}✓ 生成完成{Colors.ENDC}")
-        
-        except Exception as e:
-            print(f"\n{Colors.FAIL}✗ 错误: {e}{Colors.ENDC}")
-            return False
+    state = SseState()
+    
+    def _on_start(data, state):
+        sys.stdout.write(MSG_GEN_START)
+    
+    def _on_chunk(data, state):
+        content = data.get('content', '')
+        state.content_parts.append(content)
+        pending = state.pending
+        pending.append(content)
+        if len(pending) >= FLUSH_EVERY:
+            flush_pending(pending)
+    
+    def _on_tool(data, state):
+        tool_data = data.get('data', {})
+        state.tool_calls.append(tool_data)
+        sys.stdout.write(TOOL_HDR)
+        print(f"  - 名称: {tool_data.get('name')}")
+        print(f"  - 状态: {tool_data.get('state')}")
+        sys.stdout.write(f"  - 参数: {json_dumps(tool_data.get('parameters', {}))}\n")
+    
+    def _on_tool_result(data, state):
+        result_data = data.get('data', {})
+        state.tool_results.append(result_data)
+        sys.stdout.write(TOOL_RESULT_HDR)
+        print(f"  - 状态: {result_data.get('state')}")
+        result = result_data.get('result', '')
+        if isinstance(result, str):
+            print(f"  - 结果: {result[:100]}...")
+        else:
+            print(f"  - 结果: {result}")
+    
+    def _on_reasoning(data, state):
+        sys.stdout.write(REASONING_HDR)
+        reasoning_data = data.get('data', {})
+        print(f"  - 内容: {reasoning_data.get('content', '')[:100]}...")
+        print(f"  - 耗时: {reasoning_data.get('duration', 0)}秒")
+    
+    def _on_context(data, state):
+        state.has_context = True
+        context_data = data.get('data', {})
+        sys.stdout.write(CONTEXT_HDR)
+        print(f"  - Token使用: {context_data.get('usedTokens')}/{context_data.get('maxTokens')}")
+    
+    def _on_end(data, state):
+        sys.stdout.write(MSG_GEN_END)
+    
+    handlers = {
+        'start': _on_start,
+        'chunk': _on_chunk,
+        'context': _on_context,
+        'end': _on_end,
+        'tool': _on_tool,
+        'tool_result': _on_tool_result,
+        'reasoning': _on_reasoning,
+    }
+    
+    try:
+        async with client.stream(
+            "POST",
+            "http://localhost:8000/chat/stream",
+            json=request,
+            timeout=60.0
+        ) as response:
+            async for event in iter_sse_events(response):
+                data = json_loads(event)
+                chunk_type = data.get('type')
+                if chunk_type != 'chunk':
+                    flush_pending(state.pending)
+                
+                handlers.get(chunk_type, _noop)(data, state)
+    
+    except Exception as e:
+        flush_pending(state.pending)
+        print(f"\n{Colors.FAIL}✗ 错误: {e}{Colors.ENDC}")
+        return False
+    
+    flush_pending(state.pending)
+    
+    tool_calls = state.tool_calls
+    tool_results = state.tool_results
+    content_buffer = "".join(state.content_parts)
+    has_context = state.has_context
     
     # 验证
     print(f"\n{Colors.BOLD}统计:{Colors.ENDC}")
@@ -201,7 +320,7 @@ async def test_tool_calling():
     return success
 
 
-async def test_multiple_tools():
+async def test_multiple_tools(client: httpx.AsyncClient):
     """测试多工具调用"""
     print(f"\n{Colors.HEADER}=== 测试3: 多工具调用 ==={Colors.ENDC}")
     
@@ -211,38 +330,55 @@ async def test_multiple_tools():
         "use_tools": True,
     }
     
-    tool_calls = []
-    tool_results = []
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            async with client.stream(
-                "POST",
-                "http://localhost:8000/chat/stream",
-                json=request,
-                timeout=60.0
-            ) as response:
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = json.loads(line[6:])
-                        chunk_type = data.get('type')
-                        
-                        if chunk_type == 'chunk':
-                            print(data.get('content', ''), end='', flush=True)
-                        
-                        elif chunk_type == 'tool':
-                            tool_data = data.get('data', {})
-                            tool_calls.append(tool_data)
-                            print(f"\n{Colors.OKBLUE}🔧 [{len(tool_calls)}] {tool_data.get('name')}{Colors.ENDC}")
-                        
-                        elif chunk_type == 'tool_result':
-                            result_data = data.get('data', {})
-                            tool_results.append(result_data)
-                            print(f"{Colors.OKBLUE}✓ [{len(tool_results)}] 完成{Colors.ENDC}")
-        
-        except Exception as e:
-            print(f"\n{Colors.FAIL}✗ 错误: {e}{Colors.ENDC}")
-            return False
+    state = SseState()
+    
+    def _on_chunk(data, state):
+        pending = state.pending
+        pending.append(data.get('content', ''))
+        if len(pending) >= FLUSH_EVERY:
+            flush_pending(pending)
+    
+    def _on_tool(data, state):
+        tool_data = data.get('data', {})
+        tool_calls = state.tool_calls
+        tool_calls.append(tool_data)
+        sys.stdout.write(f"{TOOL_ITEM_PREFIX}[{len(tool_calls)}] {tool_data.get('name')}{Colors.ENDC}\n")
+    
+    def _on_tool_result(data, state):
+        tool_results = state.tool_results
+        tool_results.append(data.get('data', {}))
+        sys.stdout.write(f"{TOOL_DONE_PREFIX}[{len(tool_results)}] 完成{Colors.ENDC}\n")
+    
+    handlers = {
+        'chunk': _on_chunk,
+        'tool': _on_tool,
+        'tool_result': _on_tool_result,
+    }
+    
+    try:
+        async with client.stream(
+            "POST",
+            "http://localhost:8000/chat/stream",
+            json=request,
+            timeout=60.0
+        ) as response:
+            async for event in iter_sse_events(response):
+                data = json_loads(event)
+                chunk_type = data.get('type')
+                if chunk_type != 'chunk':
+                    flush_pending(state.pending)
+                
+                handlers.get(chunk_type, _noop)(data, state)
+    
+    except Exception as e:
+        flush_pending(state.pending)
+        print(f"\n{Colors.FAIL}✗ 错误: {e}{Colors.ENDC}")
+        return False
+    
+    flush_pending(state.pending)
+    
+    tool_calls = state.tool_calls
+    tool_results = state.tool_results
     
     # 验证
     print(f"\n{Colors.BOLD}统计:{Colors.ENDC}")
@@ -281,19 +417,21 @@ async def main():
     
     results = []
     
-    for name, test_func in tests:
-        try:
-            result = await test_func()
-            results.append((name, result))
-        except KeyboardInterrupt:
-            print(f"\n{Colors.WARNING}测试中断{Colors.ENDC}")
-            break
-        except Exception as e:
-            print(f"\n{Colors.FAIL}测试异常: {e}{Colors.ENDC}")
-            results.append((name, False))
-        
-        # 等待一下，避免请求太快
-        await asyncio.sleep(1)
+    # 所有测试共用一个客户端，三个测试互不依赖，并发执行
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(60.0),
+        limits=httpx.Limits(max_keepalive_connections=4),
+    ) as client:
+        results_raw = await asyncio.gather(
+            *(test_func(client) for _, test_func in tests),
+            return_exceptions=True,
+        )
+    
+    for (name, _), result in zip(tests, results_raw):
+        if isinstance(result, BaseException):
+            print(f"\n{Colors.FAIL}测试异常 ({name}): {result}{Colors.ENDC}")
+            result = False
+        results.append((name, result))
     
     # 总结
     print(f"\n{Colors.HEADER}{Colors.BOLD}")
@@ -4,7 +4,9 @@
 用于测试 RAG Agent 是否正常工作
 """
 
+import asyncio
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # 确保项目根目录在 Python 路径中
@@ -20,7 +22,27 @@ from rag import (
     query_rag_agent,
 )
 
-def main():
+# 重复调用 main()（例如在测试框架中）时复用已加载的对象
+_get_embeddings = lru_cache(maxsize=1)(get_embeddings)
+
+
+@lru_cache(maxsize=1)
+def _get_manager() -> IndexManager:
+    return IndexManager()
+
+
+@lru_cache(maxsize=None)
+def _get_vector_store(index_name: str):
+    return _get_manager().load_index(index_name, _get_embeddings())
+
+
+@lru_cache(maxsize=None)
+def _get_agent(index_name: str, k: int = 4):
+    retriever = create_retriever(_get_vector_store(index_name), k=k)
+    return create_rag_agent(retriever)
+
+
+async def main():
     print("\n" + "="*60)
     print("RAG 查询测试")
     print("="*60 + "\n")
@@ -35,31 +57,31 @@ def main():
     try:
         # 1. 加载索引
         print("1️⃣  加载索引...")
-        manager = IndexManager()
+        manager = _get_manager()
         
-        if not manager.index_exists(index_name):
+        # 索引检查（磁盘 I/O）与 embedding 模型初始化互不依赖，并发执行
+        _, index_exists = await asyncio.gather(
+            asyncio.to_thread(_get_embeddings),
+            asyncio.to_thread(manager.index_exists, index_name),
+        )
+        
+        if not index_exists:
             print(f"❌ 索引不存在: {index_name}")
             print("   请先创建索引:")
             print(f"   python scripts/rag_cli.py index create {index_name} data/documents/test")
             return 1
         
-        embeddings = get_embeddings()
-        vector_store = manager.load_index(index_name, embeddings)
+        await asyncio.to_thread(_get_vector_store, index_name)
         print("✅ 索引加载成功\n")
         
-        # 2. 创建检索器
-        print("2️⃣  创建检索器...")
-        retriever = create_retriever(vector_store, k=4)
-        print("✅ 检索器创建成功\n")
-        
-        # 3. 创建 RAG Agent
-        print("3️⃣  创建 RAG Agent...")
-        agent = create_rag_agent(retriever)
+        # 2-3. 创建检索器和 RAG Agent
+        print("2️⃣  创建检索器和 RAG Agent...")
+        agent = await asyncio.to_thread(_get_agent, index_name, 4)
         print("✅ RAG Agent 创建成功\n")
         
         # 4. 执行查询
         print("4️⃣  执行查询...")
-        result = query_rag_agent(agent, query)
+        result = await asyncio.to_thread(query_rag_agent, agent, query)
         print("✅ 查询完成\n")
         
         # 5. 显示结果
@@ -79,5 +101,5 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(asyncio.run(main()))
 
@@ -2,10 +2,18 @@
 """
 智能天气查询测试脚本
 测试上下文记忆和精准的时间范围查询
+
+使用方法：
+    python scripts/test_weather.py
+    
+    # 预先查询一次深圳 3 天预报并放入对话历史，后续轮次可直接从上下文回答
+    python scripts/test_weather.py --prefetch
 """
 
 import sys
+import json
 import asyncio
+from datetime import datetime
 from pathlib import Path
 
 # 添加项目根目录到 Python 路径
@@ -13,7 +21,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from agents import create_base_agent
-from core.tools import ALL_TOOLS
+from core.tools import ALL_TOOLS, get_weather_forecast
 from config import setup_logging, get_logger
 
 # 初始化日志
@@ -21,24 +29,58 @@ setup_logging()
 logger = get_logger(__name__)
 
 
-async def test_context_memory():
-    """测试上下文记忆功能"""
-    logger.info("=" * 70)
-    logger.info("测试场景：上下文记忆 + 智能天气查询")
-    logger.info("=" * 70)
+def _log_banner(title: str) -> None:
+    """输出带分隔线的标题（合并为一条日志）"""
+    line = "=" * 70
+    logger.info(f"{line}\n{title}\n{line}")
+
+
+# 完整回答追加写入的结果文件（logs/ 已被 git 忽略）
+RESULTS_FILE = project_root / "logs" / "weather_results.jsonl"
+
+# 输出被重定向（如 CI 日志）时只记录摘要，完整回答见 RESULTS_FILE
+SHOW_ANSWERS = sys.stdout.isatty()
+
+
+def _record(sink, query: str, response: str) -> None:
+    """将完整回答追加到结果文件，日志只输出一行摘要"""
+    sink.write(json.dumps(
+        {"ts": datetime.now().isoformat(), "query": query, "response": response},
+        ensure_ascii=False,
+    ) + "\n")
+    logger.info(f"🤖 回答完成: {query} ({len(response)} 字符)")
+
+
+def _user_header(text: str, sep: str = "=") -> str:
+    """用户提问的标题块"""
+    line = sep * 70
+    return f"\n{line}\n👤 用户: {text}\n{line}\n"
+
+
+async def test_context_memory(agent, sink, prefetch: bool = False):
+    """
+    测试上下文记忆功能
+    
+    Args:
+        agent: Agent 实例
+        sink: 结果文件句柄
+        prefetch: 是否预先查询深圳 3 天预报并放入对话历史。三轮问题都针对同一城市，
+            预取后 Agent 可直接根据上下文回答，省去每轮的工具调用
+    """
+    _log_banner("测试场景：上下文记忆 + 智能天气查询")
     
-    # 创建 Agent（使用所有工具）
-    agent = create_base_agent(tools=ALL_TOOLS, prompt_mode="default")
+    from langchain_core.messages import HumanMessage, AIMessage
     
     # 模拟对话历史（用于存储上下文）
     chat_history = []
     
-    # 第一轮：询问明天深圳的天气
-    print("\n" + "=" * 70)
-    print("👤 用户: 帮我查询一下明天深圳的天气")
-    print("=" * 70)
+    if prefetch:
+        forecast = await asyncio.to_thread(get_weather_forecast.invoke, {"city": "深圳"})
+        chat_history.append(AIMessage(content=f"（已预先查询）深圳未来3天天气预报：\n{forecast}"))
+        logger.info("📦 已预取深圳 3 天天气预报")
     
-    from langchain_core.messages import HumanMessage, AIMessage
+    # 第一轮：询问明天深圳的天气
+    sys.stdout.write(_user_header("帮我查询一下明天深圳的天气"))
     
     user_msg_1 = "帮我查询一下明天深圳的天气"
     response_1 = await agent.ainvoke(
@@ -46,16 +88,16 @@ async def test_context_memory():
         chat_history=chat_history,
     )
     
-    print(f"\n🤖 助手: {response_1}\n")
+    _record(sink, user_msg_1, response_1)
+    if SHOW_ANSWERS:
+        print(f"\n🤖 助手: {response_1}\n")
     
     # 更新对话历史
     chat_history.append(HumanMessage(content=user_msg_1))
     chat_history.append(AIMessage(content=response_1))
     
     # 第二轮：询问后天（应该自动记住深圳）
-    print("\n" + "=" * 70)
-    print("👤 用户: 后天呢？")
-    print("=" * 70)
+    sys.stdout.write(_user_header("后天呢？"))
     
     user_msg_2 = "后天呢？"
     response_2 = await agent.ainvoke(
@@ -63,16 +105,16 @@ async def test_context_memory():
         chat_history=chat_history,
     )
     
-    print(f"\n🤖 助手: {response_2}\n")
+    _record(sink, user_msg_2, response_2)
+    if SHOW_ANSWERS:
+        print(f"\n🤖 助手: {response_2}\n")
     
     # 更新对话历史
     chat_history.append(HumanMessage(content=user_msg_2))
     chat_history.append(AIMessage(content=response_2))
     
     # 第三轮：询问今天（应该继续记住深圳）
-    print("\n" + "=" * 70)
-    print("👤 用户: 那今天怎么样？")
-    print("=" * 70)
+    sys.stdout.write(_user_header("那今天怎么样？"))
     
     user_msg_3 = "那今天怎么样？"
     response_3 = await agent.ainvoke(
@@ -80,20 +122,16 @@ async def test_context_memory():
         chat_history=chat_history,
     )
     
-    print(f"\n🤖 助手: {response_3}\n")
+    _record(sink, user_msg_3, response_3)
+    if SHOW_ANSWERS:
+        print(f"\n🤖 助手: {response_3}\n")
     
-    logger.info("=" * 70)
-    logger.info("✅ 上下文记忆测试完成！")
-    logger.info("=" * 70)
+    _log_banner("✅ 上下文记忆测试完成！")
 
 
-async def test_single_day_query():
+async def test_single_day_query(agent, sink):
     """测试单日天气查询的准确性"""
-    logger.info("\n" + "=" * 70)
-    logger.info("测试场景：单日天气查询（应该只返回一天，不返回多天）")
-    logger.info("=" * 70)
-    
-    agent = create_base_agent(tools=ALL_TOOLS, prompt_mode="default")
+    _log_banner("测试场景：单日天气查询（应该只返回一天，不返回多天）")
     
     test_queries = [
         "明天北京天气怎么样？",
@@ -101,33 +139,52 @@ async def test_single_day_query():
         "今天广州的温度是多少？",
     ]
     
-    for query in test_queries:
-        print("\n" + "-" * 70)
-        print(f"👤 用户: {query}")
-        print("-" * 70)
-        
-        response = await agent.ainvoke(input_text=query, chat_history=[])
-        print(f"\n🤖 助手: {response}\n")
+    # 各查询互不依赖，并发请求；信号量限制同时进行的请求数，避免超出高德 API 的 QPS 限制
+    semaphore = asyncio.Semaphore(4)
     
-    logger.info("=" * 70)
-    logger.info("✅ 单日天气查询测试完成！")
-    logger.info("=" * 70)
+    async def run_query(query: str) -> str:
+        async with semaphore:
+            return await agent.ainvoke(input_text=query, chat_history=[])
+    
+    responses = await asyncio.gather(
+        *(run_query(query) for query in test_queries),
+        return_exceptions=True,
+    )
+    
+    for query, response in zip(test_queries, responses):
+        # 每个查询的提问和回答一次写出
+        if isinstance(response, Exception):
+            body = f"\n❌ 查询失败: {response}\n"
+        else:
+            _record(sink, query, response)
+            body = f"\n🤖 助手: {response}\n" if SHOW_ANSWERS else ""
+        sys.stdout.write(_user_header(query, sep="-") + body + "\n")
+    sys.stdout.flush()
+    
+    _log_banner("✅ 单日天气查询测试完成！")
 
 
-async def main():
+async def main(prefetch: bool = False):
     """主测试函数"""
     print("\n" + "🌟" * 35)
     print("   智能天气查询 + 上下文记忆测试")
     print("🌟" * 35 + "\n")
     
-    # 测试 1：上下文记忆
-    await test_context_memory()
+    # 两个测试共用一个 Agent（使用所有工具），只构建一次模型和工具
+    agent = create_base_agent(tools=ALL_TOOLS, prompt_mode="default")
     
-    # 等待一下
-    await asyncio.sleep(2)
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS_FILE, "a", encoding="utf-8") as sink:
+        # 测试 1：上下文记忆
+        await test_context_memory(agent, sink, prefetch=prefetch)
+        
+        # 等待一下
+        await asyncio.sleep(2)
+        
+        # 测试 2：单日查询准确性
+        await test_single_day_query(agent, sink)
     
-    # 测试 2：单日查询准确性
-    await test_single_day_query()
+    logger.info(f"📝 完整回答已写入: {RESULTS_FILE}")
     
     print("\n" + "🎉" * 35)
     print("   所有测试完成！")
@@ -136,7 +193,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(main(prefetch='--prefetch' in sys.argv))
     except KeyboardInterrupt:
         print("\n\n👋 测试中断")
     except Exception as e:
@@ -35,16 +35,26 @@
     - 建议定期备份索引数据
 """
 
+import asyncio
+import os
 import sys
 import json
 from pathlib import Path
 from datetime import datetime
-from typing import Set, List
+from collections import defaultdict
+from typing import Dict, Optional, Set, List, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 backend_dir = Path(__file__).resolve().parent.parent
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
+from config import get_logger
 from rag import (
     IndexManager,
     load_directory,
@@ -53,63 +63,257 @@ from rag import (
     get_embeddings,
     get_supported_extensions,
 )
+from rag.vector_stores import aembed_in_batches, embed_in_batches
+
+logger = get_logger(__name__)
+
+# 预计算 embeddings 时每个请求包含的文本块数
+EMBED_BATCH_SIZE = 256
+
+# 增量更新流水线参数
+LOAD_CONCURRENCY = 16     # 同时加载的文件数
+SPLIT_BATCH_FILES = 32    # 每累计多少个文件的文档分块一次
 
 
 class SmartIndexUpdater:
     """智能索引更新器"""
     
-    def __init__(self, index_name: str, document_dir: str):
+    def __init__(self, index_name: str, document_dir: str, pretty: bool = False):
         self.index_name = index_name
         self.document_dir = Path(document_dir)
+        # 跟踪文件是否排序并缩进（便于人工查看）
+        self.pretty = pretty
         self.manager = IndexManager()
         self.tracking_file = self.manager.base_path / index_name / "tracked_files.json"
+        # 最近一次扫描得到的目录 mtime，保存跟踪文件时写入
+        self._dir_mtimes: Optional[Dict[str, int]] = None
         
-    def get_tracked_files(self) -> Set[str]:
-        """获取已跟踪的文件列表"""
+    def _load_manifest(self) -> Dict:
+        """
+        读取跟踪文件
+        
+        Returns:
+            {'files': {相对路径: [mtime_ns, size] 或 None}, 'dir_mtimes': {相对目录: mtime_ns}}
+            旧格式中 files 为路径列表，读取后文件状态为 None
+        """
+        manifest = {'files': {}, 'dir_mtimes': {}}
         if not self.tracking_file.exists():
-            return set()
+            return manifest
         
         try:
-            with open(self.tracking_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return set(data.get('files', []))
+            raw = self.tracking_file.read_bytes()
+            data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
         except Exception as e:
             print(f"⚠️  读取跟踪文件失败: {e}")
-            return set()
+            return manifest
+        
+        files = data.get('files', {})
+        if isinstance(files, list):
+            files = dict.fromkeys(files)
+        manifest['files'] = files
+        manifest['dir_mtimes'] = data.get('dir_mtimes', {})
+        return manifest
+    
+    def get_tracked_files(self) -> Set[str]:
+        """获取已跟踪的文件列表"""
+        return set(self._load_manifest()['files'])
     
-    def save_tracked_files(self, files: Set[str]):
-        """保存已跟踪的文件列表"""
+    def save_tracked_files(self, files: Set[str], refresh: bool = False):
+        """
+        保存已跟踪的文件列表
+        
+        已跟踪文件沿用原有的 (mtime_ns, size)，只对新文件调用 stat；
+        refresh=True 时（重建索引后）对所有文件重新 stat。
+        目录 mtime 使用最近一次扫描的结果。
+        """
         self.tracking_file.parent.mkdir(parents=True, exist_ok=True)
         
+        manifest = self._load_manifest()
+        old_stats = {} if refresh else manifest['files']
+        stats = {}
+        for file in files:
+            stat = old_stats.get(file)
+            if stat is None:
+                stat = self._file_stat(file)
+            stats[file] = stat
+        
+        dir_mtimes = self._dir_mtimes if self._dir_mtimes is not None else manifest['dir_mtimes']
+        
         data = {
-            'files': sorted(list(files)),
+            'files': dict(sorted(stats.items())) if self.pretty else stats,
+            'dir_mtimes': dict(sorted(dir_mtimes.items())) if self.pretty else dir_mtimes,
             'last_updated': datetime.now().isoformat(),
             'total_files': len(files),
         }
         
-        with open(self.tracking_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if self.pretty:
+            with open(self.tracking_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        elif ORJSON_AVAILABLE:
+            self.tracking_file.write_bytes(orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE))
+        else:
+            with open(self.tracking_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    
+    def _file_stat(self, file: str) -> Optional[List[int]]:
+        """返回文件的 [mtime_ns, size]，文件不存在时返回 None"""
+        try:
+            st = os.stat(os.path.join(self.document_dir, file))
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
     
     def get_all_document_files(self) -> Set[str]:
-        """获取目录中所有支持的文档文件"""
+        """获取目录中所有支持的文档文件（同时记录各目录的 mtime）"""
         if not self.document_dir.exists():
             raise FileNotFoundError(f"文档目录不存在: {self.document_dir}")
         
-        supported_exts = get_supported_extensions()
+        supported_exts = set(get_supported_extensions())
         all_files = set()
+        dir_mtimes = {}
         
-        for ext in supported_exts.keys():
-            files = self.document_dir.glob(f"**/*{ext}")
-            all_files.update(str(f.relative_to(self.document_dir)) for f in files)
+        # 只遍历一次目录树，按扩展名过滤
+        for root, _, files in os.walk(self.document_dir):
+            dir_mtimes[os.path.relpath(root, self.document_dir)] = os.stat(root).st_mtime_ns
+            for name in files:
+                if os.path.splitext(name)[1] in supported_exts:
+                    all_files.add(os.path.relpath(os.path.join(root, name), self.document_dir))
         
+        self._dir_mtimes = dir_mtimes
         return all_files
     
+    def _scan_changed_dirs(self, dir_mtimes: Dict[str, int]) -> Tuple[Set[str], Dict[str, int]]:
+        """
+        只列出 mtime 有变化的目录中的文档
+        
+        目录中新增、删除或重命名条目时目录 mtime 会改变；mtime 与跟踪文件中
+        记录一致的目录无需列出，只需按记录继续检查其子目录。
+        
+        Returns:
+            (变化目录中的文档文件, 当前各目录的 mtime)
+        """
+        if not self.document_dir.exists():
+            raise FileNotFoundError(f"文档目录不存在: {self.document_dir}")
+        
+        supported_exts = set(get_supported_extensions())
+        children = defaultdict(list)
+        for rel_dir in dir_mtimes:
+            if rel_dir != '.':
+                children[os.path.dirname(rel_dir) or '.'].append(rel_dir)
+        
+        found = set()
+        current = {}
+        stack = ['.']
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = os.path.join(self.document_dir, rel_dir)
+            try:
+                mtime = os.stat(abs_dir).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            current[rel_dir] = mtime
+            
+            if dir_mtimes.get(rel_dir) == mtime:
+                stack.extend(children[rel_dir])
+                continue
+            
+            with os.scandir(abs_dir) as entries:
+                for entry in entries:
+                    rel = entry.name if rel_dir == '.' else os.path.join(rel_dir, entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(rel)
+                    elif os.path.splitext(entry.name)[1] in supported_exts:
+                        found.add(rel)
+        
+        return found, current
+    
     def find_new_files(self) -> List[str]:
-        """查找新增的文档文件"""
-        tracked = self.get_tracked_files()
-        current = self.get_all_document_files()
-        new_files = current - tracked
-        return sorted(list(new_files))
+        """
+        查找新增的文档文件
+        
+        只扫描 mtime 有变化的目录。变化目录中已跟踪但 (mtime, size) 不同的文件
+        会被提示为已修改：增量更新只追加文本块，重新添加会产生重复内容，
+        因此这类文件需要使用 --rebuild 处理。
+        """
+        manifest = self._load_manifest()
+        tracked = manifest['files']
+        candidates, self._dir_mtimes = self._scan_changed_dirs(manifest['dir_mtimes'])
+        
+        modified = sorted(
+            file for file in candidates
+            if tracked.get(file) is not None and self._file_stat(file) != tracked[file]
+        )
+        if modified:
+            print(f"⚠️  {len(modified)} 个已索引文档有修改（如需更新请使用 --rebuild）:")
+            for file in modified:
+                print(f"   - {file}")
+            print()
+        
+        return sorted(candidates - tracked.keys())
+    
+    @staticmethod
+    def _embed_chunks(chunks, embeddings) -> List[List[float]]:
+        """分批并发调用 aembed_documents 计算所有文本块的向量（保持顺序）"""
+        texts = [chunk.page_content for chunk in chunks]
+        return embed_in_batches(embeddings, texts, batch_size=EMBED_BATCH_SIZE)
+    
+    async def _load_split_embed(self, new_files: List[str], embeddings):
+        """
+        以流水线方式加载、分块并计算 embeddings
+        
+        loader 在线程中并发加载文件，splitter 每累计 SPLIT_BATCH_FILES 个文件分块一次，
+        embedder 对每批文本块调用 aembed_documents。三个阶段通过队列衔接、同时运行，
+        加载 I/O、分块 CPU 计算和 embedding 网络请求相互重叠。文本块按文件加载完成
+        的先后排列。
+        
+        Returns:
+            (文本块列表, 对应的向量列表, 成功加载的文件数)
+        """
+        q_load: asyncio.Queue = asyncio.Queue()
+        q_chunks: asyncio.Queue = asyncio.Queue(maxsize=4)
+        chunks, vectors = [], []
+        success_count = 0
+        semaphore = asyncio.Semaphore(LOAD_CONCURRENCY)
+        
+        async def load_one(file: str):
+            nonlocal success_count
+            async with semaphore:
+                try:
+                    docs = await asyncio.to_thread(load_document, str(self.document_dir / file))
+                except Exception as e:
+                    print(f"   ⚠️  加载失败: {file} - {e}")
+                    return
+            success_count += 1
+            await q_load.put(docs)
+        
+        async def loader():
+            await asyncio.gather(*(load_one(file) for file in new_files))
+            await q_load.put(None)
+        
+        async def splitter():
+            batch, files_in_batch = [], 0
+            while True:
+                docs = await q_load.get()
+                if docs is not None:
+                    batch.extend(docs)
+                    files_in_batch += 1
+                if batch and (docs is None or files_in_batch >= SPLIT_BATCH_FILES):
+                    await q_chunks.put(await asyncio.to_thread(split_documents, batch))
+                    batch, files_in_batch = [], 0
+                if docs is None:
+                    break
+            await q_chunks.put(None)
+        
+        async def embedder():
+            while (batch := await q_chunks.get()) is not None:
+                texts = [chunk.page_content for chunk in batch]
+                vectors.extend(
+                    await aembed_in_batches(embeddings, texts, batch_size=EMBED_BATCH_SIZE)
+                )
+                chunks.extend(batch)
+        
+        await asyncio.gather(loader(), splitter(), embedder())
+        return chunks, vectors, success_count
     
     def update_index(self, rebuild: bool = False):
         """更新索引"""
@@ -152,19 +356,21 @@ class SmartIndexUpdater:
             
             # 2. 分块
             print("2️⃣  分块文档...")
-            chunks = split_documents(documents)
+            chunks = split_documents(documents, max_workers=os.cpu_count() or 1)
             print(f"✅ 生成了 {len(chunks)} 个文本块\n")
             
             # 3. 创建 embeddings
             print("3️⃣  创建 embeddings...")
             embeddings = get_embeddings()
-            print("✅ Embeddings 准备完成\n")
+            vectors = self._embed_chunks(chunks, embeddings)
+            print(f"✅ 计算了 {len(vectors)} 个向量\n")
             
             # 4. 重建索引（覆盖）
             print("4️⃣  重建索引...")
-            self.manager.create_index(
+            self.manager.create_index_from_embeddings(
                 name=self.index_name,
                 documents=chunks,
+                vectors=vectors,
                 embeddings=embeddings,
                 description=f"重建于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
                 overwrite=True,
@@ -173,15 +379,13 @@ class SmartIndexUpdater:
             
             # 5. 更新跟踪文件
             all_files = self.get_all_document_files()
-            self.save_tracked_files(all_files)
+            self.save_tracked_files(all_files, refresh=True)
             print(f"📝 已跟踪 {len(all_files)} 个文件\n")
             
             return True
             
         except Exception as e:
-            print(f"\n❌ 重建索引失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"❌ 重建索引失败: {e}")
             return False
     
     def _incremental_update(self) -> bool:
@@ -192,6 +396,8 @@ class SmartIndexUpdater:
             new_files = self.find_new_files()
             
             if not new_files:
+                # 记录本次扫描的目录 mtime，下次可跳过未变化的目录
+                self.save_tracked_files(self.get_tracked_files())
                 print("✅ 没有新文档需要添加")
                 print("\n💡 提示:")
                 print("   - 所有文档都已索引")
@@ -203,48 +409,32 @@ class SmartIndexUpdater:
                 print(f"   {i}. {file}")
             print()
             
-            # 2. 加载新文档
-            print("2️⃣  加载新文档...")
-            documents = []
-            success_count = 0
-            
-            for file in new_files:
-                file_path = self.document_dir / file
-                try:
-                    docs = load_document(str(file_path))
-                    documents.extend(docs)
-                    success_count += 1
-                except Exception as e:
-                    print(f"   ⚠️  加载失败: {file} - {e}")
+            # 2. 加载、分块、计算 embeddings（流水线并行）
+            print("2️⃣  加载、分块并计算 embeddings...")
+            embeddings = get_embeddings()
+            chunks, vectors, success_count = asyncio.run(
+                self._load_split_embed(new_files, embeddings)
+            )
             
-            if not documents:
+            if not chunks:
                 print("❌ 没有成功加载任何文档")
                 return False
             
-            print(f"✅ 成功加载 {success_count}/{len(new_files)} 个文档\n")
-            
-            # 3. 分块
-            print("3️⃣  分块文档...")
-            chunks = split_documents(documents)
-            print(f"✅ 生成了 {len(chunks)} 个文本块\n")
-            
-            # 4. 创建 embeddings
-            print("4️⃣  创建 embeddings...")
-            embeddings = get_embeddings()
-            print("✅ Embeddings 准备完成\n")
+            print(f"✅ 成功加载 {success_count}/{len(new_files)} 个文档")
+            print(f"✅ 生成了 {len(chunks)} 个文本块，计算了 {len(vectors)} 个向量\n")
             
-            # 5. 更新索引
-            print("5️⃣  更新索引...")
-            self.manager.update_index(self.index_name, chunks, embeddings)
+            # 3. 更新索引
+            print("3️⃣  更新索引...")
+            self.manager.update_index(self.index_name, chunks, embeddings, vectors=vectors)
             print("✅ 索引更新成功\n")
             
-            # 6. 更新跟踪文件
+            # 4. 更新跟踪文件
             tracked = self.get_tracked_files()
             tracked.update(new_files)
             self.save_tracked_files(tracked)
             print(f"📝 已跟踪 {len(tracked)} 个文件（新增 {len(new_files)} 个）\n")
             
-            # 7. 显示索引信息
+            # 5. 显示索引信息
             info = self.manager.get_index_info(self.index_name)
             if info:
                 print("📊 索引统计:")
@@ -256,9 +446,7 @@ class SmartIndexUpdater:
             return True
             
         except Exception as e:
-            print(f"\n❌ 更新索引失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"❌ 更新索引失败: {e}")
             return False
 
 
@@ -276,6 +464,7 @@ def show_help():
     
 选项：
     --rebuild    强制重建整个索引（处理所有文档）
+    --pretty     跟踪文件按文件名排序并缩进保存（便于调试）
     --help       显示此帮助信息
 
 使用示例：
@@ -318,7 +507,8 @@ def show_help():
     
     📝 跟踪文件：
        - 位置: data/indexes/<索引名>/tracked_files.json
-       - 记录已索引的文档列表
+       - 记录已索引的文档及其修改时间、大小，以及各目录的修改时间
+       - 增量更新时只扫描有变化的目录
        - 自动维护，无需手动编辑
 
 更多信息：
@@ -345,9 +535,10 @@ def main():
     index_name = sys.argv[1]
     directory = sys.argv[2]
     rebuild = '--rebuild' in sys.argv
+    pretty = '--pretty' in sys.argv
     
     # 执行更新
-    updater = SmartIndexUpdater(index_name, directory)
+    updater = SmartIndexUpdater(index_name, directory, pretty=pretty)
     success = updater.update_index(rebuild=rebuild)
     
     if success:
@@ -4,34 +4,335 @@
 这个模块提供了包装器函数，可以为任何 LangGraph 节点添加安全检查。
 """
 
-from typing import Callable, Optional, Any, Dict
+import asyncio
+import contextvars
+import hashlib
+import inspect
+import operator
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Any, Dict, List, Sequence, Tuple, Union
 from functools import wraps
 
-from config.logging import get_logger
+from config.logging import get_logger, is_log_enabled
 from core.guardrails import (
     InputValidator,
     OutputValidator,
-    ContentFilter,
 )
+from core.guardrails.content_filters import default_filter, prepare_text
+from core.guardrails.runtime_batch import get_guardrails_executor
 from .state import StudyFlowState
 
 logger = get_logger(__name__)
 
+# run_in_parallel 模式下执行节点本身的线程池（与验证器分开，避免互相占满而死锁）
+_NODE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="guardrails-node")
+
+# 验证结果缓存：重试和人工审核回到同一节点时，相同内容不再重复验证
+_VALIDATE_CACHE: "OrderedDict[tuple, Any]" = OrderedDict()
+_VALIDATE_CACHE_MAX = 1024
+_VALIDATE_CACHE_LOCK = threading.Lock()
+
+
+def _as_tuple(validator) -> Tuple:
+    """将单个验证器或验证器序列统一为元组"""
+    if isinstance(validator, (list, tuple)):
+        return tuple(validator)
+    return (validator,)
+
+
+def _merge_results(results: List, filtered_field: str):
+    """
+    合并多个验证器的结果
+    
+    全部通过才算通过；errors / warnings 依次拼接；
+    过滤后的文本取最后一个非 None 的值。
+    """
+    if len(results) == 1:
+        return results[0]
+    
+    errors = []
+    warnings = []
+    metadata = {}
+    filtered = None
+    for result in results:
+        errors.extend(result.errors)
+        warnings.extend(result.warnings)
+        metadata.update(result.metadata)
+        if getattr(result, filtered_field) is not None:
+            filtered = getattr(result, filtered_field)
+    
+    return type(results[0])(
+        is_valid=all(result.is_valid for result in results),
+        errors=errors,
+        warnings=warnings,
+        metadata=metadata,
+        **{filtered_field: filtered},
+    )
+
+
+def _validate_all(validators: Sequence, filtered_field: str, *args, **kwargs):
+    """
+    执行所有验证器并合并结果
+    
+    只有一个验证器时直接调用；多个时并发执行，
+    总耗时取决于最慢的那个而不是所有验证器之和。
+    """
+    if len(validators) == 1:
+        return validators[0].validate(*args, **kwargs)
+    
+    # 一个节点配置多个验证器时，提交到全局有界执行器并发执行；
+    # 文本只预处理一次，各验证器共享
+    kwargs.setdefault("pretokenized", prepare_text(args[0]))
+    executor = get_guardrails_executor()
+    futures = [executor.submit(v.validate, *args, **kwargs) for v in validators]
+    return _merge_results([f.result() for f in futures], filtered_field)
+
+
+def _validate_many(validators: Sequence, filtered_field: str, fields: Dict[str, str]) -> Dict[str, Any]:
+    """
+    对多个字段批量验证，返回 {字段名: 合并后的结果}
+    
+    每个验证器通过 validate_many 对所有字段做一次整体过滤；
+    多个验证器时与 _validate_all 一样并发执行。
+    """
+    if len(validators) == 1:
+        per_validator = [validators[0].validate_many(fields)]
+    else:
+        executor = get_guardrails_executor()
+        futures = [executor.submit(v.validate_many, fields) for v in validators]
+        per_validator = [f.result() for f in futures]
+    
+    return {
+        name: _merge_results([results[name] for results in per_validator], filtered_field)
+        for name in fields
+    }
+
+
+def _cached_validate(
+    validators: Tuple,
+    filtered_field: str,
+    text: str,
+    sources: Optional[List[str]] = None,
+):
+    """
+    带 LRU 缓存的 _validate_all
+    
+    缓存键为 (验证器元组, 文本摘要, 来源)。键中直接持有验证器对象，
+    避免对象回收后 id 被复用导致误命中。
+    """
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    key = (validators, digest, tuple(sources) if sources else None)
+    
+    with _VALIDATE_CACHE_LOCK:
+        result = _VALIDATE_CACHE.get(key)
+        if result is not None:
+            _VALIDATE_CACHE.move_to_end(key)
+            return result
+    
+    if filtered_field == "filtered_output":
+        result = _validate_all(validators, filtered_field, text, sources=sources)
+    else:
+        result = _validate_all(validators, filtered_field, text)
+    
+    with _VALIDATE_CACHE_LOCK:
+        _VALIDATE_CACHE[key] = result
+        if len(_VALIDATE_CACHE) > _VALIDATE_CACHE_MAX:
+            _VALIDATE_CACHE.popitem(last=False)
+    
+    return result
+
+
+_get_source = operator.methodcaller("get", "source", "unknown")
+_get_metadata = operator.attrgetter("metadata")
+
+
+def _has_metadata(doc: Any) -> bool:
+    """是否为带 metadata 的文档对象"""
+    return hasattr(doc, "metadata")
+
+
+def _extract_sources(result_state: Dict[str, Any]) -> Optional[List]:
+    """从节点输出中取出来源列表，文档对象转换为其 source 元数据"""
+    sources = result_state.get("sources", []) or result_state.get("retrieved_docs", [])
+    if not sources or isinstance(sources[0], str):
+        # 空列表或已经是来源字符串，原样使用
+        return sources
+    
+    if hasattr(sources[0], "metadata"):
+        # 如果是文档对象，提取来源
+        try:
+            return list(map(_get_source, map(_get_metadata, sources)))
+        except AttributeError:
+            # 混有非文档对象时先过滤掉
+            documents = filter(_has_metadata, sources)
+            return list(map(_get_source, map(_get_metadata, documents)))
+    return sources
+
+
+def _default_input_validators(validator, strict_mode: bool) -> Tuple:
+    """未指定验证器时使用默认输入验证器"""
+    if validator is None:
+        validator = InputValidator(
+            content_filter=default_filter,
+            strict_mode=strict_mode,
+        )
+    return _as_tuple(validator)
+
+
+def _default_output_validators(validator, require_sources: bool, strict_mode: bool) -> Tuple:
+    """未指定验证器时使用默认输出验证器"""
+    if validator is None:
+        validator = OutputValidator(
+            content_filter=default_filter,
+            require_sources=require_sources,
+            strict_mode=strict_mode,
+        )
+    return _as_tuple(validator)
+
+
+def _make_input_check(
+    validators: Tuple,
+    input_field: str,
+    input_fields: Optional[Sequence[str]],
+) -> Callable[[StudyFlowState], Optional[Dict[str, Any]]]:
+    """
+    按配置生成输入验证函数，返回 {字段名: 验证结果}，没有可验证的内容时返回 None
+    
+    单字段（最常见）时不走批量路径。
+    """
+    if input_fields and len(input_fields) > 1:
+        fields = tuple(input_fields)
+        
+        def validate_state(state: StudyFlowState) -> Optional[Dict[str, Any]]:
+            contents = {}
+            for field in fields:
+                value = state.get(field)
+                if value:
+                    contents[field] = value if isinstance(value, str) else str(value)
+            if not contents:
+                return None
+            if len(contents) == 1:
+                (field, text), = contents.items()
+                return {field: _cached_validate(validators, "filtered_input", text)}
+            return _validate_many(validators, "filtered_input", contents)
+        
+        return validate_state
+    
+    field = input_fields[0] if input_fields else input_field
+    
+    def validate_state(state: StudyFlowState) -> Optional[Dict[str, Any]]:
+        value = state.get(field)
+        if not value:
+            return None
+        if not isinstance(value, str):
+            value = str(value)
+        return {field: _cached_validate(validators, "filtered_input", value)}
+    
+    return validate_state
+
+
+def _input_updates(
+    state: StudyFlowState,
+    results: Dict[str, Any],
+    mutate_state: bool = True,
+) -> Tuple[bool, Dict[str, Any]]:
+    """
+    根据输入验证结果生成状态更新
+    
+    失败时返回 (False, 只含错误字段的更新)；通过时返回
+    (True, 过滤后的输入字段)。警告默认直接追加到 state；
+    mutate_state=False 时不修改 state，而是以新列表放入更新中。
+    """
+    errors = [error for result in results.values() for error in result.errors]
+    
+    if errors:
+        error_msg = f"输入验证失败: {', '.join(errors)}"
+        logger.error(f"[Guardrails] ❌ {error_msg}")
+        return False, {"error": error_msg, "validation_failed": True}
+    
+    warnings = [warning for result in results.values() for warning in result.warnings]
+    if warnings:
+        logger.warning("[Guardrails] ⚠️ 输入警告: {}", warnings)
+    
+    updates = {name: result.filtered_input for name, result in results.items()}
+    if warnings:
+        if mutate_state:
+            state.setdefault("warnings", []).extend(warnings)
+        else:
+            updates["warnings"] = list(state.get("warnings", [])) + warnings
+    
+    logger.info("[Guardrails] ✅ 输入验证通过")
+    return True, updates
+
+
+def _merge_node_result(node_result: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    run_in_parallel 模式下合并节点结果与输入验证的更新
+    
+    过滤后的输入写回状态；节点自身返回的字段优先，警告则两者合并。
+    """
+    merged = {**updates, **node_result}
+    if "warnings" in updates and "warnings" in node_result:
+        merged["warnings"] = updates["warnings"] + [
+            warning for warning in node_result["warnings"]
+            if warning not in updates["warnings"]
+        ]
+    return merged
+
+
+def _output_text(result_state: Dict[str, Any], output_field: str) -> Optional[str]:
+    """取出要验证的输出文本，没有内容时返回 None"""
+    output_content = result_state.get(output_field)
+    if not output_content:
+        return None
+    if not isinstance(output_content, str):
+        output_content = str(output_content)
+    return output_content
+
+
+def _output_updates(result_state: Dict[str, Any], output_field: str, validation_result) -> Dict[str, Any]:
+    """
+    根据输出验证结果生成状态更新
+    
+    失败时只返回错误字段；通过时合并警告并返回过滤后的输出。
+    """
+    if not validation_result.is_valid:
+        error_msg = f"输出验证失败: {', '.join(validation_result.errors)}"
+        logger.error(f"[Guardrails] ❌ {error_msg}")
+        return {"error": error_msg, "validation_failed": True}
+    
+    if validation_result.warnings:
+        logger.warning("[Guardrails] ⚠️ 输出警告: {}", validation_result.warnings)
+        result_state.setdefault("warnings", []).extend(validation_result.warnings)
+    
+    logger.info("[Guardrails] ✅ 输出验证通过")
+    return {output_field: validation_result.filtered_output}
+
 
 def with_input_guardrails(
     node_func: Callable,
-    validator: Optional[InputValidator] = None,
+    validator: Optional[Union[InputValidator, Sequence[InputValidator]]] = None,
     input_field: str = "question",
     strict_mode: bool = False,
+    run_in_parallel: bool = False,
+    input_fields: Optional[Sequence[str]] = None,
 ):
     """
     为节点添加输入 Guardrails
     
     Args:
         node_func: 原始节点函数
-        validator: 输入验证器
+        validator: 输入验证器，传入列表时并发执行并合并结果
         input_field: 要验证的状态字段名
+        input_fields: 要一起验证的多个字段名（指定后忽略 input_field），
+            各字段通过 validate_many 批量验证
         strict_mode: 严格模式
+        run_in_parallel: 节点与输入验证同时执行。验证失败时丢弃节点结果并
+            返回错误状态；验证通过时过滤后的输入合并进节点结果。
+            注意节点看到的是未经过滤的原始输入（包括未脱敏的个人信息），
+            不要用于会把输入发送给外部模型的节点
         
     Returns:
         包装后的节点函数
@@ -42,40 +343,39 @@ def with_input_guardrails(
         >>>     # 节点逻辑
         >>>     return state
     """
-    if validator is None:
-        validator = InputValidator(
-            content_filter=ContentFilter(),
-            strict_mode=strict_mode,
-        )
+    validators = _default_input_validators(validator, strict_mode)
+    validate_state = _make_input_check(validators, input_field, input_fields)
+    node_name = node_func.__name__
     
     @wraps(node_func)
     def wrapped_node(state: StudyFlowState) -> StudyFlowState:
         """包装后的节点"""
-        logger.info(f"[Guardrails] 对节点 '{node_func.__name__}' 执行输入验证")
+        logger.info("[Guardrails] 对节点 '{}' 执行输入验证", node_name)
         
-        # 获取输入内容
-        input_content = state.get(input_field, "")
+        node_future = None
+        if run_in_parallel:
+            # 复制当前上下文，使 LangGraph / LangChain 的配置、回调在节点线程中可用
+            node_future = _NODE_POOL.submit(contextvars.copy_context().run, node_func, state)
         
-        if input_content:
-            # 验证输入
-            result = validator.validate(str(input_content))
-            
-            if not result.is_valid:
-                error_msg = f"输入验证失败: {', '.join(result.errors)}"
-                logger.error(f"[Guardrails] ❌ {error_msg}")
-                
-                # 更新状态，记录错误
-                state["error"] = error_msg
-                state["validation_failed"] = True
-                return state
-            
-            if result.warnings:
-                logger.warning(f"[Guardrails] ⚠️ 输入警告: {result.warnings}")
-                state["warnings"] = state.get("warnings", []) + result.warnings
+        # 验证输入
+        results = validate_state(state)
+        
+        if results:
+            ok, updates = _input_updates(state, results, mutate_state=node_future is None)
+            if not ok:
+                if node_future is not None:
+                    # 尚未开始的节点直接取消；已在执行的只能丢弃其结果
+                    node_future.cancel()
+                # 只返回变化的字段，由 LangGraph 合并到状态
+                return updates
             
-            # 使用过滤后的输入
-            state[input_field] = result.filtered_input
-            logger.info(f"[Guardrails] ✅ 输入验证通过")
+            if node_future is None:
+                # 使用过滤后的输入
+                state.update(updates)
+        
+        if node_future is not None:
+            # 节点线程仍在读取 state，这里不修改它，而是把更新合并进节点结果
+            return _merge_node_result(node_future.result(), updates if results else {})
         
         # 执行原始节点
         return node_func(state)
@@ -85,7 +385,7 @@ def with_input_guardrails(
 
 def with_output_guardrails(
     node_func: Callable,
-    validator: Optional[OutputValidator] = None,
+    validator: Optional[Union[OutputValidator, Sequence[OutputValidator]]] = None,
     output_field: str = "plan",
     require_sources: bool = False,
     strict_mode: bool = False,
@@ -95,7 +395,7 @@ def with_output_guardrails(
     
     Args:
         node_func: 原始节点函数
-        validator: 输出验证器
+        validator: 输出验证器，传入列表时并发执行并合并结果
         output_field: 要验证的输出字段名
         require_sources: 是否要求来源
         strict_mode: 严格模式
@@ -109,12 +409,9 @@ def with_output_guardrails(
         >>>     # 生成学习计划
         >>>     return state
     """
-    if validator is None:
-        validator = OutputValidator(
-            content_filter=ContentFilter(),
-            require_sources=require_sources,
-            strict_mode=strict_mode,
-        )
+    validators = _default_output_validators(validator, require_sources, strict_mode)
+    node_name = node_func.__name__
+    get_sources = _extract_sources if require_sources else None
     
     @wraps(node_func)
     def wrapped_node(state: StudyFlowState) -> StudyFlowState:
@@ -122,46 +419,132 @@ def with_output_guardrails(
         # 先执行原始节点
         result_state = node_func(state)
         
-        logger.info(f"[Guardrails] 对节点 '{node_func.__name__}' 执行输出验证")
+        logger.info("[Guardrails] 对节点 '{}' 执行输出验证", node_name)
         
         # 获取输出内容
-        output_content = result_state.get(output_field, "")
+        output_content = _output_text(result_state, output_field)
         
         if output_content:
             # 获取来源（如果需要）
-            sources = None
-            if require_sources:
-                sources = result_state.get("sources", []) or result_state.get("retrieved_docs", [])
-                if sources and hasattr(sources[0], "metadata"):
-                    # 如果是文档对象，提取来源
-                    sources = [
-                        doc.metadata.get("source", "unknown")
-                        for doc in sources
-                        if hasattr(doc, "metadata")
-                    ]
+            sources = get_sources(result_state) if get_sources is not None else None
             
             # 验证输出
-            validation_result = validator.validate(
-                str(output_content),
+            validation_result = _cached_validate(
+                validators,
+                "filtered_output",
+                output_content,
                 sources=sources,
             )
+            result_state.update(_output_updates(result_state, output_field, validation_result))
+        
+        return result_state
+    
+    return wrapped_node
+
+
+def with_input_guardrails_async(
+    node_func: Callable,
+    validator: Optional[Union[InputValidator, Sequence[InputValidator]]] = None,
+    input_field: str = "question",
+    strict_mode: bool = False,
+    run_in_parallel: bool = False,
+    input_fields: Optional[Sequence[str]] = None,
+):
+    """
+    with_input_guardrails 的异步版本，用于 async 节点
+    
+    验证提交到全局 Guardrails 执行器，不阻塞事件循环；run_in_parallel 时节点作为
+    task 与验证同时运行，验证失败时取消该 task。参数同 with_input_guardrails。
+    
+    Returns:
+        包装后的异步节点函数
+    """
+    validators = _default_input_validators(validator, strict_mode)
+    validate_state = _make_input_check(validators, input_field, input_fields)
+    node_name = node_func.__name__
+    
+    @wraps(node_func)
+    async def wrapped_node(state: StudyFlowState) -> StudyFlowState:
+        """包装后的节点"""
+        logger.info("[Guardrails] 对节点 '{}' 执行输入验证", node_name)
+        
+        node_task = None
+        if run_in_parallel:
+            node_task = asyncio.create_task(node_func(state))
+        
+        # 验证输入
+        try:
+            results = await get_guardrails_executor().asubmit(validate_state, state)
+        except BaseException:
+            if node_task is not None:
+                node_task.cancel()
+            raise
+        
+        if results:
+            ok, updates = _input_updates(state, results, mutate_state=node_task is None)
+            if not ok:
+                if node_task is not None:
+                    node_task.cancel()
+                # 只返回变化的字段，由 LangGraph 合并到状态
+                return updates
             
-            if not validation_result.is_valid:
-                error_msg = f"输出验证失败: {', '.join(validation_result.errors)}"
-                logger.error(f"[Guardrails] ❌ {error_msg}")
-                
-                # 更新状态，记录错误
-                result_state["error"] = error_msg
-                result_state["validation_failed"] = True
-                return result_state
-            
-            if validation_result.warnings:
-                logger.warning(f"[Guardrails] ⚠️ 输出警告: {validation_result.warnings}")
-                result_state["warnings"] = result_state.get("warnings", []) + validation_result.warnings
+            if node_task is None:
+                # 使用过滤后的输入
+                state.update(updates)
+        
+        if node_task is not None:
+            # 节点仍在读取 state，这里不修改它，而是把更新合并进节点结果
+            return _merge_node_result(await node_task, updates if results else {})
+        
+        # 执行原始节点
+        return await node_func(state)
+    
+    return wrapped_node
+
+
+def with_output_guardrails_async(
+    node_func: Callable,
+    validator: Optional[Union[OutputValidator, Sequence[OutputValidator]]] = None,
+    output_field: str = "plan",
+    require_sources: bool = False,
+    strict_mode: bool = False,
+):
+    """
+    with_output_guardrails 的异步版本，用于 async 节点
+    
+    验证提交到全局 Guardrails 执行器，不阻塞事件循环。参数同 with_output_guardrails。
+    
+    Returns:
+        包装后的异步节点函数
+    """
+    validators = _default_output_validators(validator, require_sources, strict_mode)
+    node_name = node_func.__name__
+    get_sources = _extract_sources if require_sources else None
+    
+    @wraps(node_func)
+    async def wrapped_node(state: StudyFlowState) -> StudyFlowState:
+        """包装后的节点"""
+        # 先执行原始节点
+        result_state = await node_func(state)
+        
+        logger.info("[Guardrails] 对节点 '{}' 执行输出验证", node_name)
+        
+        # 获取输出内容
+        output_content = _output_text(result_state, output_field)
+        
+        if output_content:
+            # 获取来源（如果需要）
+            sources = get_sources(result_state) if get_sources is not None else None
             
-            # 使用过滤后的输出
-            result_state[output_field] = validation_result.filtered_output
-            logger.info(f"[Guardrails] ✅ 输出验证通过")
+            # 验证输出
+            validation_result = await get_guardrails_executor().asubmit(
+                _cached_validate,
+                validators,
+                "filtered_output",
+                output_content,
+                sources,
+            )
+            result_state.update(_output_updates(result_state, output_field, validation_result))
         
         return result_state
     
@@ -173,6 +556,7 @@ def with_guardrails(
     output_field: Optional[str] = None,
     require_sources: bool = False,
     strict_mode: bool = False,
+    run_in_parallel: bool = False,
 ):
     """
     装饰器：同时添加输入和输出 Guardrails
@@ -182,6 +566,7 @@ def with_guardrails(
         output_field: 要验证的输出字段名
         require_sources: 是否要求来源
         strict_mode: 严格模式
+        run_in_parallel: 输入验证与节点同时执行（见 with_input_guardrails）
         
     Returns:
         装饰器函数
@@ -195,10 +580,13 @@ def with_guardrails(
     def decorator(node_func: Callable) -> Callable:
         """装饰器"""
         wrapped = node_func
+        is_async = inspect.iscoroutinefunction(node_func)
+        wrap_input = with_input_guardrails_async if is_async else with_input_guardrails
+        wrap_output = with_output_guardrails_async if is_async else with_output_guardrails
         
         # 先包装输出（内层）
         if output_field:
-            wrapped = with_output_guardrails(
+            wrapped = wrap_output(
                 wrapped,
                 output_field=output_field,
                 require_sources=require_sources,
@@ -207,10 +595,11 @@ def with_guardrails(
         
         # 再包装输入（外层）
         if input_field:
-            wrapped = with_input_guardrails(
+            wrapped = wrap_input(
                 wrapped,
                 input_field=input_field,
                 strict_mode=strict_mode,
+                run_in_parallel=run_in_parallel,
             )
         
         return wrapped
@@ -226,6 +615,8 @@ def create_safe_node(
     output_field: str = "result",
     require_sources: bool = False,
     strict_mode: bool = False,
+    run_in_parallel: bool = False,
+    input_fields: Optional[Sequence[str]] = None,
 ) -> Callable:
     """
     创建安全节点（函数式 API）
@@ -238,9 +629,11 @@ def create_safe_node(
         output_field: 输出字段名
         require_sources: 是否要求来源
         strict_mode: 严格模式
+        run_in_parallel: 输入验证与节点同时执行（见 with_input_guardrails）
+        input_fields: 要一起批量验证的多个输入字段名（见 with_input_guardrails）
         
     Returns:
-        包装后的安全节点
+        包装后的安全节点（node_func 为 async 函数时返回 async 节点）
         
     Example:
         >>> from workflows.nodes import planner_node
@@ -252,8 +645,13 @@ def create_safe_node(
     """
     wrapped = node_func
     
+    # async 节点使用异步包装器，验证不阻塞事件循环
+    is_async = inspect.iscoroutinefunction(node_func)
+    wrap_input = with_input_guardrails_async if is_async else with_input_guardrails
+    wrap_output = with_output_guardrails_async if is_async else with_output_guardrails
+    
     if validate_output:
-        wrapped = with_output_guardrails(
+        wrapped = wrap_output(
             wrapped,
             output_field=output_field,
             require_sources=require_sources,
@@ -261,10 +659,12 @@ def create_safe_node(
         )
     
     if validate_input:
-        wrapped = with_input_guardrails(
+        wrapped = wrap_input(
             wrapped,
             input_field=input_field,
             strict_mode=strict_mode,
+            run_in_parallel=run_in_parallel,
+            input_fields=input_fields,
         )
     
     return wrapped
@@ -341,12 +741,12 @@ def create_human_review_node(
     """
     def human_review_node(state: StudyFlowState) -> StudyFlowState:
         """人工审核节点"""
-        logger.info(f"[Human Review] 等待人工审核字段: {review_field}")
-        
-        # 获取需要审核的内容
-        content = state.get(review_field, "")
+        logger.info("[Human Review] 等待人工审核字段: {}", review_field)
         
-        logger.info(f"[Human Review] 审核内容: {content[:100]}...")
+        # 获取需要审核的内容（只在输出日志时截取）
+        if is_log_enabled("INFO"):
+            content = state.get(review_field, "")
+            logger.info("[Human Review] 审核内容: {}...", content[:100])
         
         # 标记为等待审核状态
         state["awaiting_review"] = True
@@ -5,7 +5,9 @@
 """
 
 import logging
-from typing import Literal
+import threading
+from functools import lru_cache
+from typing import Literal, Optional
 
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
@@ -28,6 +30,23 @@ from config.logging import get_logger
 
 logger = get_logger(__name__)
 
+# SQLite 检查点按路径在进程内共享；内存检查点每次编译各建一个，
+# 避免不同调用在相同 thread_id 下共享状态
+_SQLITE_SAVER_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=16)
+def _create_sqlite_saver(checkpointer_path: str):
+    """打开 SQLite 检查点（按路径缓存）"""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    return SqliteSaver.from_conn_string(checkpointer_path)
+
+
+def _sqlite_saver(checkpointer_path: str):
+    """获取共享的 SQLite 检查点，加锁避免并发首次调用时重复打开"""
+    with _SQLITE_SAVER_LOCK:
+        return _create_sqlite_saver(checkpointer_path)
+
 
 def should_continue(state: StudyFlowState) -> Literal["retry", "end"]:
     """条件路由函数"""
@@ -65,7 +84,7 @@ def create_safe_study_flow_graph(
         strict_mode: 严格模式（任何警告都视为错误）
         
     Returns:
-        编译后的安全工作流图
+        编译后的安全工作流图（使用 SQLite 检查点时相同配置返回同一个实例）
         
     Example:
         >>> from workflows.safe_study_flow import create_safe_study_flow_graph
@@ -83,6 +102,43 @@ def create_safe_study_flow_graph(
         >>>     "messages": []
         >>> }, config)
     """
+    return _get_graph(enable_human_review, strict_mode, checkpointer_path)
+
+
+def _get_graph(
+    enable_human_review: bool,
+    strict_mode: bool,
+    checkpointer_path: Optional[str],
+):
+    """
+    获取编译后的安全学习工作流图
+    
+    使用 SQLite 检查点时按配置缓存整个编译结果；使用内存检查点时复用
+    已包装好节点的 StateGraph，但每次都以新的 MemorySaver 编译，
+    保证各次运行互不影响。
+    """
+    if checkpointer_path:
+        return _compile_sqlite_graph(enable_human_review, strict_mode, checkpointer_path)
+    
+    logger.info("[Safe Study Flow] 使用内存检查点")
+    return _build_workflow(enable_human_review, strict_mode).compile(checkpointer=MemorySaver())
+
+
+@lru_cache(maxsize=8)
+def _compile_sqlite_graph(enable_human_review: bool, strict_mode: bool, checkpointer_path: str):
+    """以共享的 SQLite 检查点编译工作流图（按配置缓存）"""
+    workflow = _build_workflow(enable_human_review, strict_mode)
+    logger.info(f"[Safe Study Flow] 使用 SQLite 检查点: {checkpointer_path}")
+    return workflow.compile(checkpointer=_sqlite_saver(checkpointer_path))
+
+
+@lru_cache(maxsize=8)
+def _build_workflow(enable_human_review: bool, strict_mode: bool) -> StateGraph:
+    """
+    构建未编译的安全学习工作流图（按配置缓存）
+    
+    包装节点和定义边只在每种配置首次使用时执行一次。
+    """
     logger.info("[Safe Study Flow] 开始创建安全学习工作流图")
     logger.info(f"   人工审核: {enable_human_review}")
     logger.info(f"   严格模式: {strict_mode}")
@@ -189,25 +245,9 @@ def create_safe_study_flow_graph(
         }
     )
     
-    # ==================== 编译工作流 ====================
-    
-    logger.info("[Safe Study Flow] 编译工作流...")
-    
-    # 设置检查点
-    if checkpointer_path:
-        from langgraph.checkpoint.sqlite import SqliteSaver
-        checkpointer = SqliteSaver.from_conn_string(checkpointer_path)
-        logger.info(f"[Safe Study Flow] 使用 SQLite 检查点: {checkpointer_path}")
-    else:
-        checkpointer = MemorySaver()
-        logger.info("[Safe Study Flow] 使用内存检查点")
-    
-    # 编译
-    compiled_graph = workflow.compile(checkpointer=checkpointer)
-    
     logger.info("[Safe Study Flow] ✅ 安全学习工作流图创建完成")
     
-    return compiled_graph
+    return workflow
 
 
 # 便捷函数：创建默认的安全工作流
@@ -220,11 +260,7 @@ def create_default_safe_flow():
     os.makedirs(checkpoint_dir, exist_ok=True)
     checkpoint_path = os.path.join(checkpoint_dir, "safe_study_flow.db")
     
-    return create_safe_study_flow_graph(
-        checkpointer_path=checkpoint_path,
-        enable_human_review=True,
-        strict_mode=False,
-    )
+    return _get_graph(True, False, checkpoint_path)
 
 
 # 便捷函数：运行安全工作流
@@ -254,13 +290,10 @@ def run_safe_study_flow(
         >>> )
         >>> print(result["plan"])
     """
-    logger.info(f"[Safe Study Flow] 运行安全工作流: {question}")
+    logger.info("[Safe Study Flow] 运行安全工作流: {}", question)
     
-    # 创建工作流
-    graph = create_safe_study_flow_graph(
-        enable_human_review=enable_human_review,
-        strict_mode=strict_mode,
-    )
+    # 获取工作流（同一配置只构建一次）
+    graph = _get_graph(enable_human_review, strict_mode, None)
     
     # 配置
     config = {
@@ -318,13 +351,10 @@ async def stream_safe_study_flow(
         >>> async for chunk in stream_safe_study_flow("如何学习 LangChain？"):
         >>>     print(chunk)
     """
-    logger.info(f"[Safe Study Flow] 流式运行安全工作流: {question}")
+    logger.info("[Safe Study Flow] 流式运行安全工作流: {}", question)
     
-    # 创建工作流
-    graph = create_safe_study_flow_graph(
-        enable_human_review=enable_human_review,
-        strict_mode=strict_mode,
-    )
+    # 获取工作流（同一配置只构建一次）
+    graph = _get_graph(enable_human_review, strict_mode, None)
     
     # 配置
     config = {